@@ -1,7 +1,7 @@
 # -*- mode: python ; coding: utf-8 -*-
 from PyInstaller.utils.hooks import collect_all
 
-datas = [('img', 'img'), ('font', 'font'), ('legacy', 'legacy')]
+datas = [('img', 'img'), ('font', 'font'), ('layout', 'layout'), ('legacy', 'legacy')]
 binaries = []
 hiddenimports = ['pystray', 'PIL', 'PIL.Image', 'PIL.ImageDraw', 'PIL.ImageFont', 'psutil', 'requests', 'hid', 'threading', 'configparser', 'tkinter', 'tkinter.simpledialog', 'tkinter.messagebox', 'tkinter.filedialog', 'datetime']
 tmp_ret = collect_all('app')
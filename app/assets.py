@@ -0,0 +1,118 @@
+# app/assets.py
+"""
+图片素材图集
+
+img/ 和 img/cpu_img/ 下的 PNG / JPG 只解码一次并常驻内存，
+渲染时按 key（相对 img/ 的路径，如 "0.png"、"cpu_img/8_100.png"）直接取用。
+
+- 一次性刷新进程：用到哪张解码哪张（比全部预解码更省）
+- 托盘进程 / 常驻工作进程：启动时 preload() 全部解码，之后每帧零文件 IO
+
+BitmapAtlas 是图集的 1 bit 视图：素材第一次取用时按策略（阈值 / 抖动）转成 mode "1" 并缓存，
+直接在 1 bit 画布上渲染时每帧不再做颜色转换和二值化。
+"""
+import fnmatch
+import threading
+from pathlib import Path
+
+from PIL import Image
+
+from app.utils import resource_path
+
+ASSET_SUFFIXES = (".png", ".jpg")
+
+
+class AssetAtlas:
+    def __init__(self, root: Path):
+        self.root = root
+        self._images = {}
+        self._lock = threading.Lock()
+
+    def _decode(self, key: str) -> Image.Image:
+        with Image.open(self.root / key) as im:
+            im.load()
+            # 脱离文件句柄，避免常驻进程里攒下打开的文件
+            return im.copy()
+
+    def get(self, key: str) -> Image.Image:
+        """按 key 取素材；不存在时抛 FileNotFoundError（与 Image.open 一致）"""
+        image = self._images.get(key)
+        if image is None:
+            with self._lock:
+                image = self._images.get(key)
+                if image is None:
+                    image = self._decode(key)
+                    self._images[key] = image
+        return image
+
+    def preload(self) -> int:
+        """解码全部素材，返回数量"""
+        count = 0
+        for folder in (self.root, self.root / "cpu_img"):
+            for path in sorted(folder.iterdir()):
+                if path.suffix.lower() not in ASSET_SUFFIXES:
+                    continue
+                try:
+                    self.get(path.relative_to(self.root).as_posix())
+                    count += 1
+                except Exception as e:
+                    print(f"[Assets] 素材解码失败: {path.name} {e}")
+        return count
+
+
+_atlas = None
+_atlas_lock = threading.Lock()
+
+
+def get_atlas() -> AssetAtlas:
+    """进程内共享的图集"""
+    global _atlas
+    with _atlas_lock:
+        if _atlas is None:
+            _atlas = AssetAtlas(resource_path("img"))
+        return _atlas
+
+
+class BitmapAtlas:
+    """
+    图集的 1 bit 视图
+    threshold: 默认阈值，灰度 >= 阈值为白
+    dither: 改用 Floyd-Steinberg 抖动的素材 key 通配符（如 "*.jpg"）
+    thresholds: 按素材 key 通配符覆盖阈值 {"cpu_img/*": 100}
+    """
+
+    def __init__(self, atlas: AssetAtlas, threshold: int, dither=(), thresholds=None):
+        self.atlas = atlas
+        self.threshold = threshold
+        self.dither = tuple(dither)
+        self.thresholds = dict(thresholds or {})
+        self._images = {}
+        self._lock = threading.Lock()
+
+    def policy(self, key: str) -> tuple:
+        """素材的二值化策略 (阈值, 是否抖动)"""
+        dither = any(fnmatch.fnmatch(key, pattern) for pattern in self.dither)
+        threshold = self.threshold
+        for pattern, value in self.thresholds.items():
+            if fnmatch.fnmatch(key, pattern):
+                threshold = value
+                break
+        return threshold, dither
+
+    def _convert(self, key: str) -> Image.Image:
+        gray = self.atlas.get(key).convert("L")
+        threshold, dither = self.policy(key)
+        if dither:
+            return gray.convert("1")
+        lut = [0] * threshold + [255] * (256 - threshold)
+        return gray.point(lut, "1")
+
+    def get(self, key: str) -> Image.Image:
+        image = self._images.get(key)
+        if image is None:
+            with self._lock:
+                image = self._images.get(key)
+                if image is None:
+                    image = self._convert(key)
+                    self._images[key] = image
+        return image
@@ -30,6 +30,18 @@ CONFIG_SCHEMA = {
             "default": False,
             "label": "保存配置后立即刷新一次",
         },
+        "mode": {
+            "type": str,
+            "default": "subprocess",
+            "label": "刷新方式（subprocess 独立子进程，90 秒超时 / worker 常驻工作进程 / inprocess 托盘进程内，无进程隔离）",
+        },
+        "metrics_interval_seconds": {
+            "type": int,
+            "default": 0,
+            "label": "系统指标刷新间隔（秒，0 为关闭；只重画 CPU / 内存区，不联网，但仍整帧推送）",
+            "min": 0,
+            "max": 3600,
+        },
     },
     "night": {
         "skip_night": {
@@ -60,6 +72,63 @@ CONFIG_SCHEMA = {
             "label": "城市 / Location",
         },
     },
+    "display": {
+        "threshold": {
+            "type": int,
+            "default": 128,
+            "label": "黑白二值化阈值（灰度低于此值为黑）",
+            "min": 1,
+            "max": 255,
+        },
+        "multi_device": {
+            "type": bool,
+            "default": False,
+            "label": "推送到所有已连接的墨水屏",
+        },
+        "layout": {
+            "type": str,
+            "default": "default",
+            "label": "画面布局（layout/ 下的布局名，或布局 JSON 文件路径）",
+        },
+        "render_mode": {
+            "type": str,
+            "default": "1",
+            "label": "渲染模式（1: 直接渲染 1 bit 画面；rgb: RGB 渲染后再二值化）",
+        },
+        "debug_snapshot": {
+            "type": bool,
+            "default": False,
+            "label": "保存画面快照到 ~/.update-weather/output.png（调试用）",
+        },
+    },
+    "cache": {
+        "ttl_3d_minutes": {
+            "type": int,
+            "default": 180,
+            "label": "3 天预报缓存时间（分钟，0 为不缓存）",
+            "min": 0,
+            "max": 1440,
+        },
+        "ttl_now_minutes": {
+            "type": int,
+            "default": 10,
+            "label": "实时天气缓存时间（分钟，0 为不缓存）",
+            "min": 0,
+            "max": 1440,
+        },
+        "ttl_minutely_minutes": {
+            "type": int,
+            "default": 5,
+            "label": "分钟降水缓存时间（分钟，0 为不缓存）",
+            "min": 0,
+            "max": 1440,
+        },
+        "stale_while_revalidate": {
+            "type": bool,
+            "default": False,
+            "label": "先用过期缓存显示，后台再更新",
+        },
+    },
     "mail": {
         "enabled": {
             "type": bool,
@@ -145,6 +214,14 @@ class AppConfig:
     def refresh_immediately_on_config_change(self) -> bool:
         return self.get("refresh", "refresh_immediately_on_config_change")
 
+    @property
+    def refresh_mode(self) -> str:
+        return self.get("refresh", "mode")
+
+    @property
+    def metrics_interval_seconds(self) -> int:
+        return self.get("refresh", "metrics_interval_seconds")
+
     @property
     def skip_night(self) -> bool:
         return self.get("night", "skip_night")
@@ -165,6 +242,42 @@ class AppConfig:
     def location(self) -> str:
         return self.get("weather", "location")
 
+    @property
+    def display_threshold(self) -> int:
+        return self.get("display", "threshold")
+
+    @property
+    def display_multi_device(self) -> bool:
+        return self.get("display", "multi_device")
+
+    @property
+    def display_layout(self) -> str:
+        return self.get("display", "layout")
+
+    @property
+    def display_render_mode(self) -> str:
+        return self.get("display", "render_mode")
+
+    @property
+    def display_debug_snapshot(self) -> bool:
+        return self.get("display", "debug_snapshot")
+
+    @property
+    def cache_ttl_3d_minutes(self) -> int:
+        return self.get("cache", "ttl_3d_minutes")
+
+    @property
+    def cache_ttl_now_minutes(self) -> int:
+        return self.get("cache", "ttl_now_minutes")
+
+    @property
+    def cache_ttl_minutely_minutes(self) -> int:
+        return self.get("cache", "ttl_minutely_minutes")
+
+    @property
+    def cache_stale_while_revalidate(self) -> bool:
+        return self.get("cache", "stale_while_revalidate")
+
     @property
     def mail_enabled(self) -> bool:
         return self.get("mail", "enabled")
@@ -0,0 +1,87 @@
+# app/debug_snapshot.py
+"""
+画面快照（调试用）
+
+渲染结果直接在内存里交给打包 / 推送，不再先存 output.png 再读回来。
+需要查看画面时打开 display.debug_snapshot：每帧交给后台线程编码成 PNG，
+写到 ~/.update-weather/output.png（打包后的程序里 BASE_DIR 是临时解压目录，不再往那里写）。
+
+写盘在后台线程里做，刷新不等 PNG 编码和磁盘 IO；写得比刷新慢时只保留最新一帧。
+"""
+import os
+import threading
+from pathlib import Path
+
+SNAPSHOT_DIR = Path.home() / ".update-weather"
+SNAPSHOT_FILE = SNAPSHOT_DIR / "output.png"
+
+
+class SnapshotSink:
+    def __init__(self, path: Path = SNAPSHOT_FILE):
+        self.path = path
+        self._cond = threading.Condition()
+        self._pending = None
+        self._busy = False
+        self._thread = None
+
+    def submit(self, image):
+        """提交一帧，立即返回（调用方之后不要再修改这张图）"""
+        with self._cond:
+            self._pending = image
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="debug-snapshot", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._pending is None:
+                    return
+                image, self._pending = self._pending, None
+                self._busy = True
+            try:
+                self._write(image)
+            except Exception as e:
+                print(f"[Snapshot] 保存画面失败: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _write(self, image):
+        """先写临时文件再原子替换，查看时不会读到半张图"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.path.with_suffix(".png.tmp")
+        image.save(tmp_file, format="PNG")
+        os.replace(tmp_file, self.path)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """等排队的快照写完（一次性刷新进程退出前调用），超时返回 False"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._pending is None and not self._busy, timeout)
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_snapshot_sink() -> SnapshotSink:
+    """进程内共享的快照写入器"""
+    global _sink
+    with _sink_lock:
+        if _sink is None:
+            _sink = SnapshotSink()
+        return _sink
+
+
+def save_snapshot(image, enabled: bool = None):
+    """
+    按配置异步保存画面快照
+    enabled 为空时读 display.debug_snapshot
+    """
+    if enabled is None:
+        from app.config import CONFIG
+        enabled = CONFIG.display_debug_snapshot
+    if enabled:
+        get_snapshot_sink().submit(image)
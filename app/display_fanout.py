@@ -0,0 +1,172 @@
+# app/display_fanout.py
+"""
+多块墨水屏分发
+
+同一台主机上接了多把带同款 128x296 屏的 ZMK 键盘时，渲染一次，
+把同一帧（或按设备路径各自的帧）并行推送到每一块屏：
+- 每块屏一个 DeviceManager（固定路径、各自的分包缓冲）和一个写入线程
+- 每次提交时枚举一次，新插入的屏自动加入，拔掉的屏移除
+- 各屏只保留最新一帧；写入失败的屏在后台定时重试，直到成功或有更新的帧
+- 等待本轮全部写完（有超时），汇报每块屏的结果和耗时
+
+总耗时约等于最慢的一块屏，而不是各屏之和。
+"""
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+# 单块屏推送等待上限（秒），超时的屏在报告里记为失败，线程继续在后台写
+PUSH_TIMEOUT = 30.0
+
+# 写入失败后的重试间隔（秒）
+RETRY_SECONDS = 2.0
+
+
+class DeviceWriter:
+    """一块屏的写入线程，只保留最新一帧"""
+
+    def __init__(self, path):
+        from app.hid_device import DeviceManager
+
+        self.path = path
+        self.device = DeviceManager(path, rediscover=False)
+        self._cond = threading.Condition()
+        self._job = None
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name=f"eink-writer-{path!r}", daemon=True)
+        self._thread.start()
+
+    def submit(self, frame: bytes) -> Future:
+        future = Future()
+        with self._cond:
+            # 还没写的旧帧直接作废；写失败等待重试的帧已经有结果了，直接替换
+            if self._job is not None and not self._job[1].done():
+                self._job[1].set_result({"ok": False, "error": "已被更新的画面取代", "latency": 0.0})
+            self._job = (frame, future)
+            self._cond.notify()
+        return future
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._job is None and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                job = self._job
+            frame, future = job
+
+            start = time.time()
+            try:
+                self.device.push(frame)
+                result = {"ok": True, "latency": round(time.time() - start, 3)}
+            except Exception as e:
+                self.device.close()
+                result = {"ok": False, "error": str(e), "latency": round(time.time() - start, 3)}
+
+            with self._cond:
+                if not future.done():
+                    future.set_result(result)
+                if result["ok"] and self._job is job:
+                    self._job = None
+                elif not result["ok"] and self._job is job:
+                    # 失败的帧留在队列里，稍后重试（期间有新帧会直接替换）
+                    self._cond.wait(RETRY_SECONDS)
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self.device.close()
+
+
+class FanoutOutput:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.writers = {}
+        self.last_report = {}
+
+    def _sync_devices(self):
+        """按当前枚举结果增减写入线程"""
+        from app.eink import find_device_paths
+
+        paths = find_device_paths()
+        for path in list(self.writers):
+            if path not in paths:
+                print(f"[Fanout] 设备已移除: {path!r}")
+                self.writers.pop(path).stop()
+        for path in paths:
+            if path not in self.writers:
+                print(f"[Fanout] 发现设备: {path!r}")
+                self.writers[path] = DeviceWriter(path)
+
+    def submit(self, frame, force: bool = False) -> str:
+        """
+        把一帧推送到所有墨水屏，返回 "pushed" / "skipped" / "queued" / "no_device"
+        frame 为 bytes 时各屏显示同一帧；为 {path: bytes} 时按设备路径各自推送
+        与某块屏上当前画面一致时跳过该屏，force=True 时总是发送
+        "queued" 表示有屏写入失败、在后台重试；一块屏都没有时返回 "no_device"，
+        不排队也不等待插入，下次刷新时重新枚举
+        """
+        from app.eink import frame_digest
+        from app.state_file import update_last_frame_hash
+
+        with self._lock:
+            start = time.time()
+            self._sync_devices()
+            if not self.writers:
+                self.last_report = {}
+                print("[Fanout] 没有已连接的墨水屏，本次不推送")
+                return "no_device"
+
+            futures = {}
+            report = {}
+            for path, writer in self.writers.items():
+                data = frame.get(path) if isinstance(frame, dict) else frame
+                if data is None:
+                    continue
+                if not force and writer.device.last_frame == data:
+                    report[path] = {"ok": True, "skipped": True, "latency": 0.0}
+                    continue
+                futures[path] = writer.submit(data)
+
+            deadline = start + PUSH_TIMEOUT
+            for path, future in futures.items():
+                try:
+                    report[path] = future.result(timeout=max(deadline - time.time(), 0))
+                except FutureTimeoutError:
+                    report[path] = {"ok": False, "error": "推送超时", "latency": PUSH_TIMEOUT}
+
+            for path, item in report.items():
+                state = "跳过" if item.get("skipped") else ("成功" if item["ok"] else f"失败 {item['error']}")
+                print(f"[Fanout] {path!r}: {state}，{round(item['latency'] * 1000)}ms")
+            print(f"[Fanout] {len(report)} 块屏，总耗时 {round((time.time() - start) * 1000)}ms")
+
+            self.last_report = report
+            if not isinstance(frame, dict) and futures and all(report[p]["ok"] for p in futures):
+                update_last_frame_hash(frame_digest(frame))
+
+            if any(item["ok"] and not item.get("skipped") for item in report.values()):
+                return "pushed"
+            if all(item["ok"] for item in report.values()):
+                return "skipped"
+            return "queued"
+
+    def close(self):
+        with self._lock:
+            for writer in self.writers.values():
+                writer.stop()
+            self.writers.clear()
+
+
+_fanout = None
+_fanout_lock = threading.Lock()
+
+
+def get_fanout_output() -> FanoutOutput:
+    """进程内共享的多屏输出"""
+    global _fanout
+    with _fanout_lock:
+        if _fanout is None:
+            _fanout = FanoutOutput()
+        return _fanout
@@ -0,0 +1,125 @@
+# app/display_output.py
+"""
+墨水屏输出（支持热插拔）
+
+拉取、渲染与设备是否插着无关：渲染好的帧交给输出阶段，
+- 设备在：立即推送（画面与上次发送的一致时跳过）
+- 设备不在 / 推送中途被拔掉：只保留最新一帧排队，后台线程定时 hid.enumerate
+  （只枚举，不打开设备，开销很小），设备一出现就把排队的帧推上去
+
+这样键盘重新插上后立即显示最新数据，不用重新拉取天气。
+"""
+import threading
+import time
+
+# 等待设备插入时的枚举间隔（秒）
+HOTPLUG_POLL_SECONDS = 2.0
+
+# 设备不在 / 连接失败时可能抛出的异常
+DEVICE_ERRORS = (RuntimeError, OSError, ValueError)
+
+
+class DisplayOutput:
+    def __init__(self, device=None):
+        from app.hid_device import get_device_manager
+
+        self.device = device or get_device_manager()
+        self._lock = threading.Lock()
+        # 排队中的最新帧: (frame, digest)
+        self._pending = None
+        self._watcher = None
+        self._stop = threading.Event()
+
+    @property
+    def pending(self) -> bool:
+        return self._pending is not None
+
+    def submit(self, frame: bytes, force: bool = False) -> str:
+        """
+        提交一帧，返回 "pushed" / "skipped" / "queued"
+        画面与上次成功发送的一致时跳过，force=True 时总是发送
+        """
+        from app.eink import frame_digest
+        from app.state_file import get_last_frame_hash
+
+        digest = frame_digest(frame)
+        with self._lock:
+            if not force and digest == get_last_frame_hash():
+                # 屏幕上已经是这一帧，排队中的旧帧也不用再发
+                self._pending = None
+                print("[DisplayOutput] 画面未变化，跳过墨水屏刷新")
+                return "skipped"
+
+            self._pending = (frame, digest)
+            if self._flush():
+                return "pushed"
+
+        self._ensure_watcher()
+        return "queued"
+
+    def _flush(self) -> bool:
+        """推送排队的帧（调用方持有 self._lock），成功返回 True"""
+        from app.state_file import update_last_frame_hash
+
+        frame, digest = self._pending
+        try:
+            self.device.push(frame)
+        except DEVICE_ERRORS as e:
+            self.device.close()
+            print(f"[DisplayOutput] 墨水屏不可用，最新画面已排队等待设备: {e}")
+            return False
+
+        update_last_frame_hash(digest)
+        self._pending = None
+        return True
+
+    def _ensure_watcher(self):
+        with self._lock:
+            if self._watcher is not None and self._watcher.is_alive():
+                return
+            self._watcher = threading.Thread(target=self._watch, name="display-hotplug", daemon=True)
+            self._watcher.start()
+
+    def _watch(self):
+        from app.eink import find_device_paths
+
+        while not self._stop.wait(HOTPLUG_POLL_SECONDS):
+            if self._pending is None:
+                return
+            try:
+                if not find_device_paths():
+                    continue
+            except Exception as e:
+                print(f"[DisplayOutput] 枚举设备失败: {e}")
+                continue
+
+            start = time.time()
+            with self._lock:
+                if self._pending is None:
+                    return
+                if self._flush():
+                    print(f"[DisplayOutput] 设备已连接，排队画面已推送，耗时 {round(time.time() - start, 2)}s")
+                    return
+
+    def close(self):
+        """丢弃排队的帧并关闭连接（切换到多屏输出时调用）"""
+        with self._lock:
+            self._pending = None
+        self.device.close()
+
+    def stop(self):
+        self._stop.set()
+        self.device.close()
+
+
+_output = None
+_output_lock = threading.Lock()
+
+
+def get_display_output() -> DisplayOutput:
+    """进程内共享的墨水屏输出"""
+    global _output
+    with _output_lock:
+        if _output is None:
+            _output = DisplayOutput()
+        return _output
@@ -0,0 +1,102 @@
+# app/eink.py
+"""
+墨水屏编码与 HID 传输（0x1d50:0x615e，usage_page 65300）
+
+hid 在真正枚举 / 打开设备时才导入：画面没变化、只算帧指纹时不加载它
+"""
+import binascii
+import hashlib
+
+from app.framebuffer import DEFAULT_THRESHOLD, pack_frame
+from app.hid_frame import PacketFramer
+
+VID = 0x1d50
+PID = 0x615e
+USAGE_PAGE = 65300
+
+# 版本查询包，设备回包里带 Zephyr / ZMK / 固件版本
+VERSION_QUERY = binascii.unhexlify(
+    '01050408011200000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000')
+
+_framer = PacketFramer()
+
+
+def frame_digest(frame: bytes) -> str:
+    """帧缓冲指纹，用来判断画面是否和上次发送的一样"""
+    return hashlib.sha1(frame).hexdigest()
+
+
+def frame_packets(frame: bytes) -> list[memoryview]:
+    """
+    把打包好的帧缓冲切成 HID 数据包
+    返回的包复用同一块缓冲区，下一次编码前要先发送完
+    """
+    return _framer.frame(frame)
+
+
+def encode_frame(img, threshold: int = DEFAULT_THRESHOLD) -> list[memoryview]:
+    """把 128x296 画面编码成 HID 数据包列表"""
+    return frame_packets(pack_frame(img, threshold))
+
+
+def find_device_paths() -> list:
+    """枚举所有墨水屏接口的 HID 路径（usage_page 65300）"""
+    import hid
+
+    return [info["path"] for info in hid.enumerate(VID, PID) if info.get("usage_page") == USAGE_PAGE]
+
+
+def find_device_path():
+    """第一块墨水屏的 HID 路径"""
+    import hid
+
+    devices = hid.enumerate(VID, PID)
+    if not devices:
+        raise RuntimeError("墨水屏未连接，跳过本次刷新")
+
+    for info in devices:
+        if info.get("usage_page") == USAGE_PAGE:
+            return info["path"]
+    raise RuntimeError("未找到符合条件的 HID 设备")
+
+
+def read_firmware(d, timeout_ms: int = 0) -> dict:
+    """发送版本查询，读取 Zephyr / ZMK / 固件版本"""
+    d.write(VERSION_QUERY)
+
+    raw = d.read(1000, timeout_ms) if timeout_ms else d.read(1000)
+    pack = bytes(raw).decode("utf8", "ignore")
+
+    firmware = {
+        "zephyr": pack[9:16],
+        "zmk": pack[18:25],
+        "firmware": pack[27:34],
+    }
+    print('Zephyr 版本:' + firmware["zephyr"])
+    print('ZMK 版本:' + firmware["zmk"])
+    print('固件版本:' + firmware["firmware"])
+    return firmware
+
+
+def open_path(path):
+    import hid
+
+    d = hid.device()
+    d.open_path(path)
+    print("HID device opened")
+    return d
+
+
+def open_device():
+    """查找并打开墨水屏，读取一次固件版本"""
+    d = open_path(find_device_path())
+    read_firmware(d)
+    return d
+
+
+def send_packets(device, packets: list):
+    """逐包写入一帧"""
+    for packet in packets:
+        if device.write(packet) == -1:
+            raise OSError("HID 写入失败")
+    print('图片刷新完成')
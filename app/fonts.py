@@ -0,0 +1,109 @@
+# app/fonts.py
+"""
+字体与字形缓存
+
+- 字体对象按 (字体文件, 字号) 缓存，不再每个字符 truetype 一次
+- 逐字绘制的文字（城市名、分钟降水）按字符预先光栅化成蒙版，
+  之后每次渲染只是把蒙版贴到画面上，不再重新解析 TTF
+  像素结果与 ImageDraw.text 完全一致（同样的光栅化、同样的混合）
+- 1 bit 画布上用预先二值化的字形蒙版（白底黑字，与整帧二值化结果一致）
+"""
+import math
+import threading
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+
+from app.utils import resource_path
+
+# 渲染用到的字体
+CITY_FONT = ("font/1657694032434275.ttf", 8)
+MINUTELY_FONT = ("font/DinkieBitmapDemo-9px.ttf", 10)
+
+
+@lru_cache(maxsize=None)
+def get_font(name: str, size: int) -> ImageFont.FreeTypeFont:
+    """按 (字体文件, 字号) 取字体对象"""
+    return ImageFont.truetype(str(resource_path(name)), size)
+
+
+class GlyphCache:
+    def __init__(self, name: str, size: int):
+        self.font = get_font(name, size)
+        self.size = size
+        self._glyphs = {}
+        self._bitmaps = {}
+        self._lock = threading.Lock()
+
+    def _rasterize(self, ch: str, start: tuple):
+        """
+        在草稿蒙版上画出单个字符，裁出非空区域
+        返回 (蒙版, dx, dy)，空白字符返回 None
+        """
+        pad = self.size * 2
+        canvas = Image.new("L", (pad * 3, pad * 3), 0)
+        ImageDraw.Draw(canvas).text((pad + start[0], pad + start[1]), ch, fill=255, font=self.font)
+        bbox = canvas.getbbox()
+        if bbox is None:
+            return None
+        return canvas.crop(bbox), bbox[0] - pad, bbox[1] - pad
+
+    def glyph(self, ch: str, start: tuple = (0.0, 0.0)):
+        # 坐标小数部分会影响光栅化结果，一并作为 key
+        key = (ch, start)
+        if key not in self._glyphs:
+            with self._lock:
+                if key not in self._glyphs:
+                    self._glyphs[key] = self._rasterize(ch, start)
+        return self._glyphs[key]
+
+    def bitmap_glyph(self, ch: str, start: tuple, threshold: int):
+        """
+        1 bit 画布用的字形：抗锯齿蒙版先在白底上合成黑字、再按阈值二值化，
+        与在 RGB 画布上画字后整帧二值化的结果一致
+        """
+        key = (ch, start, threshold)
+        if key not in self._bitmaps:
+            glyph = self.glyph(ch, start)
+            with self._lock:
+                if key not in self._bitmaps:
+                    if glyph is not None:
+                        mask, dx, dy = glyph
+                        over_white = Image.new("L", mask.size, 255)
+                        over_white.paste(0, (0, 0), mask)
+                        lut = [255] * threshold + [0] * (256 - threshold)
+                        glyph = over_white.point(lut, "1"), dx, dy
+                    self._bitmaps[key] = glyph
+        return self._bitmaps[key]
+
+    def draw(self, image: Image.Image, xy: tuple, ch: str, fill="black", threshold: int = 128):
+        """
+        等价于 ImageDraw.Draw(image).text(xy, ch, fill=fill, font=self.font)
+        mode "1" 画布上画黑字，threshold 为整帧二值化的阈值
+        """
+        fx, ix = math.modf(xy[0])
+        fy, iy = math.modf(xy[1])
+        if image.mode == "1":
+            glyph = self.bitmap_glyph(ch, (fx, fy), threshold)
+            fill = 0
+        else:
+            glyph = self.glyph(ch, (fx, fy))
+        if glyph is None:
+            return
+        mask, dx, dy = glyph
+        image.paste(fill, (int(ix) + dx, int(iy) + dy), mask)
+
+    def preload(self, chars: str):
+        for ch in chars:
+            self.glyph(ch)
+
+
+@lru_cache(maxsize=None)
+def get_glyph_cache(name: str, size: int) -> GlyphCache:
+    """按 (字体文件, 字号) 取进程内共享的字形缓存"""
+    return GlyphCache(name, size)
+
+
+def preload_glyphs():
+    """预先光栅化常用字符（常驻进程启动时调用）"""
+    get_glyph_cache(*MINUTELY_FONT).preload("0123456789未来两小时无降水分钟后开始停止雨雪将持续，。")
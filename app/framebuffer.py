@@ -0,0 +1,31 @@
+# app/framebuffer.py
+"""
+画面 → 1 bit 帧缓冲
+
+128x296 的画面按行、每 8 个像素打成 1 个字节（高位在前），
+像素灰度 >= 阈值为 1（白），否则为 0（黑），共 4736 字节。
+
+直接用 PIL 的查表二值化 + mode "1" tobytes，由 C 代码一次完成，
+输出与原先逐像素拼 '0b...' 字符串的实现逐字节一致（对照金样见 tests/fixtures）。
+基准测试：
+
+    python -m bench.framebuffer
+"""
+from PIL import Image
+
+FRAME_WIDTH = 128
+FRAME_HEIGHT = 296
+FRAME_BYTES = FRAME_WIDTH * FRAME_HEIGHT // 8
+
+DEFAULT_THRESHOLD = 128
+
+
+def pack_frame(img: Image.Image, threshold: int = DEFAULT_THRESHOLD) -> bytes:
+    """
+    把画面打包成 1 bit 帧缓冲
+    已经是 mode "1" 的画面（直接 1 bit 渲染）不再转换，threshold 不起作用
+    """
+    if img.mode == "1":
+        return img.tobytes()
+    lut = [0] * threshold + [255] * (256 - threshold)
+    return img.convert("L").point(lut, "1").tobytes()
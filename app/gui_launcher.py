@@ -0,0 +1,110 @@
+# app/gui_launcher.py
+"""
+设置窗口的单实例检测与启动（托盘进程里用）
+
+只依赖标准库：托盘导入它不会加载 tkinter，也不会改变工作目录；
+真正的窗口在独立进程里（main.py --gui → app/gui_process.py）。
+"""
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+LOCK_FILE = Path.home() / ".update-weather" / "gui.lock"
+LOCK_FILE.parent.mkdir(exist_ok=True)
+
+# ================== 单实例管理 ==================
+def is_gui_running():
+    """检查是否有存活的 GUI 进程"""
+    if not LOCK_FILE.exists():
+        return None
+
+    try:
+        pid_str = LOCK_FILE.read_text().strip()
+        if not pid_str.isdigit():
+            raise ValueError("锁文件内容不是有效 PID")
+        pid = int(pid_str)
+    except Exception as e:
+        print(f"锁文件无效或损坏，自动清理: {e}")
+        LOCK_FILE.unlink(missing_ok=True)
+        return None
+
+    try:
+        os.kill(pid, 0)  # 检查进程是否存在
+        return pid
+    except OSError:
+        print(f"旧 GUI 进程 (pid={pid}) 已不存在，清理锁文件")
+        LOCK_FILE.unlink(missing_ok=True)
+        return None
+
+
+def activate_existing_gui(pid: int):
+    """尝试激活旧窗口，失败时打印日志但不影响新窗口"""
+    print(f"检测到已有实例 (pid={pid})，尝试激活...")
+    try:
+        result = subprocess.run(
+            [
+                "osascript",
+                "-e",
+                f'tell application "System Events" to set frontmost of the first process whose unix id is {pid} to true'
+            ],
+            check=False,
+            timeout=4,
+            capture_output=True,
+            text=True
+        )
+        if result.returncode == 0:
+            print("激活成功")
+        else:
+            err_msg = result.stderr.strip() or "未知错误"
+            print(f"激活失败: {err_msg}")
+    except Exception as e:
+        print(f"激活过程中异常: {e}")
+
+
+def launch_gui_process(on_exit=None):
+    """
+    启动设置窗口进程；on_exit 在窗口进程退出后调用（托盘用它唤醒调度器检查配置变更）
+    """
+    existing_pid = is_gui_running()
+    if existing_pid:
+        activate_existing_gui(existing_pid)
+        return
+
+    root_dir = Path(__file__).resolve().parent.parent  # gui_launcher.py → app → root
+
+    gui_script = root_dir / "app" / "gui_process.py"
+
+    # ✅ 关键修复：使用 -m 参数 + 模块名
+    # 而不是直接传文件路径
+    # 这样 Python 会正确识别 if __name__ == "__main__" 块
+    
+    env = os.environ.copy()
+    env["PYTHONPATH"] = str(root_dir) + os.pathsep + env.get("PYTHONPATH", "")
+
+    print(f"[Launch GUI] 启动独立 GUI 进程")
+    print(f"  可执行文件: {sys.executable}")
+    print(f"  GUI 脚本: {gui_script}")
+    print(f"  工作目录: {root_dir}")
+
+    try:
+        # ✅ 改用 -m app.gui_process 方式启动
+        # 这样会执行 if __name__ == "__main__" 块中的代码
+        proc = subprocess.Popen(
+            [sys.executable, "main.py", "--gui"],
+            cwd=str(root_dir),
+            env=env,
+            start_new_session=True,
+        )
+        print("[Launch GUI] GUI 进程启动成功")
+    except Exception as e:
+        print(f"[Launch GUI] 启动 GUI 进程失败: {e}")
+        return
+
+    if on_exit is not None:
+        def wait_and_notify():
+            proc.wait()
+            on_exit()
+
+        threading.Thread(target=wait_and_notify, name="gui-exit-watcher", daemon=True).start()
@@ -8,9 +8,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import os
 import sys
-import subprocess
 from pathlib import Path
-import webbrowser
 import gc
 
 from app.state_file import get_next_refresh_time
@@ -23,63 +21,12 @@ project_root = this_file_dir.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
-# 同时强制把 cwd 也设成根目录
-os.chdir(project_root)
-
 from app.config import CONFIG, CONFIG_SCHEMA
+# 单实例检测 / 启动设置进程在轻量的 gui_launcher 里（托盘只导入它，不加载 tkinter）
+from app.gui_launcher import LOCK_FILE, activate_existing_gui, is_gui_running, launch_gui_process  # noqa: F401
 
-LOCK_FILE = Path.home() / ".update-weather" / "gui.lock"
-LOCK_FILE.parent.mkdir(exist_ok=True)
 
 # ================== 单实例管理 ==================
-def is_gui_running():
-    """检查是否有存活的 GUI 进程"""
-    if not LOCK_FILE.exists():
-        return None
-
-    try:
-        pid_str = LOCK_FILE.read_text().strip()
-        if not pid_str.isdigit():
-            raise ValueError("锁文件内容不是有效 PID")
-        pid = int(pid_str)
-    except Exception as e:
-        print(f"锁文件无效或损坏，自动清理: {e}")
-        LOCK_FILE.unlink(missing_ok=True)
-        return None
-
-    try:
-        os.kill(pid, 0)  # 检查进程是否存在
-        return pid
-    except OSError:
-        print(f"旧 GUI 进程 (pid={pid}) 已不存在，清理锁文件")
-        LOCK_FILE.unlink(missing_ok=True)
-        return None
-
-
-def activate_existing_gui(pid: int):
-    """尝试激活旧窗口，失败时打印日志但不影响新窗口"""
-    print(f"检测到已有实例 (pid={pid})，尝试激活...")
-    try:
-        result = subprocess.run(
-            [
-                "osascript",
-                "-e",
-                f'tell application "System Events" to set frontmost of the first process whose unix id is {pid} to true'
-            ],
-            check=False,
-            timeout=4,
-            capture_output=True,
-            text=True
-        )
-        if result.returncode == 0:
-            print("激活成功")
-        else:
-            err_msg = result.stderr.strip() or "未知错误"
-            print(f"激活失败: {err_msg}")
-    except Exception as e:
-        print(f"激活过程中异常: {e}")
-
-
 def write_lock():
     LOCK_FILE.write_text(str(os.getpid()))
     print(f"写入锁文件: pid={os.getpid()}")
@@ -153,6 +100,9 @@ class ConfigGUI:
         # 窗口打开后立即更新状态
         self.update_status_label()
 
+        # 刷新时发现 key / location 未填写会打开这里，直接切到天气设置
+        self.root.after(200, self.prompt_missing_weather)
+
         # 每 10 秒刷新一次状态
         self.root.after(10000, self.periodic_update_status)
 
@@ -184,6 +134,13 @@ class ConfigGUI:
         except Exception as e:
             self.status_label.config(text=f"读取状态失败：{str(e)}", foreground="red")
 
+    def prompt_missing_weather(self):
+        """key / location 未填写时提示用户填写（只在设置窗口里提示，刷新路径不弹窗）"""
+        if CONFIG.weather_key and CONFIG.location:
+            return
+        self.notebook.select(self.weather_tab)
+        messagebox.showinfo("请填写天气设置", "请输入你的和风天气 API key 和城市")
+
     def periodic_update_status(self):
         """定时更新状态"""
         self.update_status_label()
@@ -253,6 +210,7 @@ class ConfigGUI:
     def create_weather_tab(self):
         frame = ttk.Frame(self.notebook, padding="20")
         self.notebook.add(frame, text="天气配置")
+        self.weather_tab = frame
 
         ttk.Label(frame, text="天气 API Key:", font=("Helvetica", 11)).grid(row=0, column=0, sticky="w", pady=10)
         key_var = tk.StringVar(value=CONFIG.weather_key)
@@ -308,6 +266,13 @@ class ConfigGUI:
 
     def save_config(self):
         """保存所有配置"""
+        if not self.widgets["weather.key"].get().strip():
+            messagebox.showerror("错误", "未填写和风天气 API key")
+            return
+        if not self.widgets["weather.location"].get().strip():
+            messagebox.showerror("错误", "未填写 'location' 参数")
+            return
+
         try:
             CONFIG.set("refresh", "interval_minutes", self.widgets["refresh.interval_minutes"].get())
             CONFIG.set("refresh", "force_refresh_at_midnight", self.widgets["refresh.force_refresh_at_midnight"].get())
@@ -322,8 +287,14 @@ class ConfigGUI:
             CONFIG.set("night", "night_start", self.widgets["night.night_start"].get())
             CONFIG.set("night", "night_end", self.widgets["night.night_end"].get())
 
+            new_location = self.widgets["weather.location"].get()
+            if new_location != CONFIG.location:
+                # 城市变了，经纬度缓存作废
+                from app.weather_api import clear_geo_cache
+                clear_geo_cache()
+
             CONFIG.set("weather", "key", self.widgets["weather.key"].get())
-            CONFIG.set("weather", "location", self.widgets["weather.location"].get())
+            CONFIG.set("weather", "location", new_location)
 
             CONFIG.set("mail", "enabled", self.widgets["mail.enabled"].get())
 
@@ -343,12 +314,16 @@ class ConfigGUI:
 
     def open_url(self, url: str):
         try:
+            import webbrowser
             webbrowser.open(url, new=2)
         except Exception as ex:
             messagebox.showerror("无法打开链接", f"开启浏览器失败：\n{ex}")
 
 # ================== 主程序 ==================
 def main():
+    # 强制把 cwd 设成根目录（只在真正打开设置窗口时做，不影响 import 本模块的进程）
+    os.chdir(project_root)
+
     existing_pid = is_gui_running()
     if existing_pid:
         activate_existing_gui(existing_pid)
@@ -379,42 +354,5 @@ def main():
     root.mainloop()
 
 
-def launch_gui_process():
-    existing_pid = is_gui_running()
-    if existing_pid:
-        activate_existing_gui(existing_pid)
-        return
-
-    from pathlib import Path
-    root_dir = Path(__file__).resolve().parent.parent  # gui_process.py → app → root
-
-    gui_script = root_dir / "app" / "gui_process.py"
-
-    # ✅ 关键修复：使用 -m 参数 + 模块名
-    # 而不是直接传文件路径
-    # 这样 Python 会正确识别 if __name__ == "__main__" 块
-    
-    env = os.environ.copy()
-    env["PYTHONPATH"] = str(root_dir) + os.pathsep + env.get("PYTHONPATH", "")
-
-    print(f"[Launch GUI] 启动独立 GUI 进程")
-    print(f"  可执行文件: {sys.executable}")
-    print(f"  GUI 脚本: {gui_script}")
-    print(f"  工作目录: {root_dir}")
-
-    try:
-        # ✅ 改用 -m app.gui_process 方式启动
-        # 这样会执行 if __name__ == "__main__" 块中的代码
-        subprocess.Popen(
-            [sys.executable, "main.py", "--gui"],
-            cwd=str(root_dir),
-            env=env,
-            start_new_session=True,
-        )
-        print("[Launch GUI] GUI 进程启动成功")
-    except Exception as e:
-        print(f"[Launch GUI] 启动 GUI 进程失败: {e}")
-
-
 if __name__ == "__main__":
     main()
\ No newline at end of file
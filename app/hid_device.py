@@ -0,0 +1,129 @@
+# app/hid_device.py
+"""
+墨水屏连接管理
+
+常驻进程里长期持有 HID 句柄，缓存设备路径和固件信息：
+- 首次推送时枚举、打开、握手（版本查询）各一次
+- 之后每帧直接写包，不再 enumerate / open / 读版本
+- 写入失败才关闭句柄重连：先试缓存的路径，打不开再重新枚举
+
+同时记录屏幕上当前的帧，推送时统计新帧有哪些 64 字节包变了（见 PacketFramer.changed_packets）；
+固件只接受整帧消息，所以发送的始终是整帧，包级差异留给日志和将来固件支持后的局部传输。
+"""
+import threading
+import time
+
+from app.hid_frame import PacketFramer
+
+# 握手读版本的超时；设备不回包时不至于一直卡住
+HANDSHAKE_TIMEOUT_MS = 2000
+
+
+class DeviceManager:
+    def __init__(self, path=None, rediscover: bool = True):
+        """
+        path: 已知的设备路径；为 None 时首次连接再枚举
+        rediscover: 路径失效时是否重新枚举第一块屏（多屏分发时每个连接固定一块屏，传 False）
+        """
+        self._lock = threading.Lock()
+        # 每个连接各自一份分包缓冲，多块屏并行写入互不干扰
+        self._framer = PacketFramer()
+        self.path = path
+        self.rediscover = rediscover
+        self.device = None
+        self.firmware = None
+        # 屏幕上当前的帧；重新连接后未知，置 None
+        self.last_frame = None
+        # 最近一次推送相对上一帧变化的包序号（上一帧未知时为 None）
+        self.last_changed = None
+
+    @property
+    def connected(self) -> bool:
+        return self.device is not None
+
+    def _open(self):
+        from app.eink import find_device_path, open_path, read_firmware
+
+        start = time.time()
+        try:
+            if self.path is None:
+                raise OSError("设备路径未知")
+            device = open_path(self.path)
+        except (OSError, IOError):
+            if not self.rediscover:
+                raise
+            # 缓存的路径失效（重新插拔后路径可能变化），重新枚举
+            self.path = find_device_path()
+            device = open_path(self.path)
+
+        try:
+            self.firmware = read_firmware(device, HANDSHAKE_TIMEOUT_MS)
+        except Exception:
+            device.close()
+            raise
+        self.device = device
+        self._reset_frame()
+        print(f"[HIDDevice] 已连接，耗时 {round((time.time() - start) * 1000)}ms")
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self.device is not None:
+            try:
+                self.device.close()
+            except Exception:
+                pass
+            self.device = None
+            self._reset_frame()
+
+    def _reset_frame(self):
+        self.last_frame = None
+        self.last_changed = None
+
+    def _write(self, packets):
+        for packet in packets:
+            if self.device.write(packet) == -1:
+                raise OSError("HID 写入失败")
+
+    def _count_changed(self, frame: bytes):
+        """统计相对屏幕上当前帧变化的包（只用于日志）"""
+        if self.last_frame is None:
+            self.last_changed = None
+            return
+        self.last_changed = self._framer.changed_packets(self.last_frame, frame)
+        print(f"[HIDDevice] 变化 {len(self.last_changed)}/{self._framer.count} 包，整帧发送")
+
+    def push(self, frame: bytes):
+        """
+        写入一帧；沿用已打开的句柄，写失败时重新连接一次、整帧重发
+        设备不在时抛 RuntimeError（来自枚举）
+        """
+        with self._lock:
+            if self.device is None:
+                self._open()
+
+            try:
+                self._count_changed(frame)
+                self._write(self._framer.frame(frame))
+            except (OSError, ValueError) as e:
+                print(f"[HIDDevice] HID 写入失败，重新连接: {e}")
+                self._close()
+                self._open()
+                self._write(self._framer.frame(frame))
+            self.last_frame = frame
+            print('图片刷新完成')
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_device_manager() -> DeviceManager:
+    """进程内共享的墨水屏连接"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = DeviceManager()
+        return _manager
@@ -0,0 +1,76 @@
+# app/hid_frame.py
+"""
+HID 分包
+
+一帧 4736 字节的 1 bit 帧缓冲切成 64 字节的 HID 包：
+- 第 1 包: 01 3e 8d25 0807 2a88 2508 0b10 8025 1a80 25（17 字节头）+ 47 字节数据
+- 中间包: 01 3e + 62 字节数据
+- 最后 1 包: 01 28 + 剩余数据，不足 62 字节补 0
+
+包头是固定的，所以全部包预先分配在一块 bytearray 里，包头只写一次；
+每帧只把数据切片拷进对应位置，返回各包的 memoryview，不再拼十六进制字符串。
+注意：返回的 memoryview 会在下一次 frame() 时被覆盖，要先发完再编下一帧。
+
+changed_packets 给出两帧之间内容不同的包序号。现有固件只接受从头开始的整帧消息，
+只重发变化包需要固件支持，目前一律整帧发送，包级差异只用于日志统计。
+
+输出与原先拼十六进制字符串的实现逐字节一致（对照金样见 tests/fixtures）。
+基准测试：
+
+    python -m bench.hid_frame
+"""
+from app.framebuffer import FRAME_BYTES
+
+PACKET_SIZE = 64
+FIRST_HEADER = bytes.fromhex('013e8d2508072a8825080b1080251a8025')
+NEXT_HEADER = bytes.fromhex('013e')
+LAST_HEADER = bytes.fromhex('0128')
+
+
+class PacketFramer:
+    def __init__(self, frame_size: int = FRAME_BYTES):
+        self.frame_size = frame_size
+        self.first_payload = PACKET_SIZE - len(FIRST_HEADER)
+        self.body_payload = PACKET_SIZE - len(NEXT_HEADER)
+
+        middle = (frame_size - self.first_payload) // self.body_payload
+        self.count = 1 + middle + 1
+
+        self._buf = bytearray(PACKET_SIZE * self.count)
+        view = memoryview(self._buf)
+        self.packets = [view[i * PACKET_SIZE:(i + 1) * PACKET_SIZE] for i in range(self.count)]
+
+        # 包头固定，只写一次
+        self.packets[0][:len(FIRST_HEADER)] = FIRST_HEADER
+        for packet in self.packets[1:-1]:
+            packet[:len(NEXT_HEADER)] = NEXT_HEADER
+        self.packets[-1][:len(LAST_HEADER)] = LAST_HEADER
+
+        # 每个包的数据在帧缓冲里的范围 (start, end)，以及在包里的起点
+        self.slices = []
+        pos = 0
+        for i in range(self.count):
+            head = len(FIRST_HEADER) if i == 0 else len(NEXT_HEADER)
+            end = min(pos + PACKET_SIZE - head, frame_size)
+            self.slices.append((pos, end, head))
+            pos = end
+
+    def frame(self, data) -> list[memoryview]:
+        """把一帧数据写进预分配的包，返回各包的 memoryview"""
+        if len(data) != self.frame_size:
+            raise ValueError(f"帧大小应为 {self.frame_size} 字节，实际 {len(data)}")
+
+        src = memoryview(data)
+        for packet, (start, end, head) in zip(self.packets, self.slices):
+            n = end - start
+            packet[head:head + n] = src[start:end]
+            if head + n < PACKET_SIZE:
+                packet[head + n:] = bytes(PACKET_SIZE - head - n)
+        return self.packets
+
+    def changed_packets(self, prev, data) -> list[int]:
+        """两帧之间内容不同的包序号（只用于统计 / 日志，发送仍是整帧）"""
+        return [
+            i for i, (start, end, _) in enumerate(self.slices)
+            if prev[start:end] != data[start:end]
+        ]
@@ -0,0 +1,179 @@
+# app/http_cache.py
+"""
+接口响应缓存（按接口配置 TTL）
+
+- 新鲜期内直接返回磁盘缓存，不发请求（只限当天存的，跨天一律重新请求）
+- 过期后带 If-None-Match / If-Modified-Since 条件请求，304 时沿用旧数据
+- stale-while-revalidate：过期但不太旧的数据先返回给渲染用，后台线程再去更新
+
+缓存文件放在 ~/.update-weather/http_cache/，刷新子进程之间也能复用。
+"""
+import datetime
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+CACHE_DIR = Path.home() / ".update-weather" / "http_cache"
+
+# 过期数据最多还能“先用着”多久：TTL 的倍数
+STALE_FACTOR = 2
+
+
+class ResponseCache:
+    def __init__(self, ttl: dict, stale_while_revalidate: bool = False, cache_dir: Path = CACHE_DIR):
+        """
+        ttl: {接口名: 秒数}，没有配置或 <= 0 的接口不缓存
+        """
+        self.ttl = ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._revalidating = set()
+        self._executor = None
+
+    # ================== 磁盘读写 ==================
+    def _path(self, url: str, params: dict) -> Path:
+        raw = url + "?" + json.dumps(params, sort_keys=True, ensure_ascii=False)
+        return self.cache_dir / (hashlib.sha1(raw.encode("utf-8")).hexdigest() + ".json")
+
+    def _load(self, path: Path) -> dict | None:
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"[HttpCache] 读取缓存失败: {e}")
+            return None
+
+    def _save(self, path: Path, entry: dict):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = path.with_suffix(".json.tmp")
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            tmp_file.replace(path)
+        except Exception as e:
+            print(f"[HttpCache] 保存缓存失败: {e}")
+            try:
+                if tmp_file.exists():
+                    tmp_file.unlink()
+            except Exception:
+                pass
+
+    # ================== 网络请求 ==================
+    def _fetch(self, session, url: str, params: dict, timeout: float, path: Path, entry: dict | None) -> dict:
+        """发请求（有缓存时带条件头），返回新的缓存条目"""
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        with session.get(url, params=params, headers=headers, timeout=timeout) as r:
+            if r.status_code == 304 and entry:
+                entry["stored_at"] = time.time()
+                self._save(path, entry)
+                return entry
+
+            r.raise_for_status()
+            payload = r.json()
+            new_entry = {
+                "url": url,
+                "stored_at": time.time(),
+                "etag": r.headers.get("ETag"),
+                "last_modified": r.headers.get("Last-Modified"),
+                "payload": payload,
+            }
+
+        # 和风天气出错时也是 HTTP 200，只缓存 code == "200" 的业务成功结果
+        if isinstance(payload, dict) and payload.get("code", "200") == "200":
+            self._save(path, new_entry)
+        return new_entry
+
+    def _revalidate_in_background(self, session, url: str, params: dict, timeout: float, path: Path, entry: dict):
+        with self._lock:
+            if path in self._revalidating:
+                return
+            self._revalidating.add(path)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="CacheRevalidate")
+
+        def worker():
+            try:
+                self._fetch(session, url, params, timeout, path, entry)
+                print(f"[HttpCache] 后台更新完成: {url}")
+            except Exception as e:
+                print(f"[HttpCache] 后台更新失败: {url} {e}")
+            finally:
+                with self._lock:
+                    self._revalidating.discard(path)
+
+        self._executor.submit(worker)
+
+    # ================== 对外接口 ==================
+    def reload_config(self):
+        """从 CONFIG 读取 TTL 和 stale-while-revalidate 开关"""
+        from app.config import CONFIG
+
+        self.ttl = {
+            "3d": CONFIG.cache_ttl_3d_minutes * 60,
+            "now": CONFIG.cache_ttl_now_minutes * 60,
+            "minutely": CONFIG.cache_ttl_minutely_minutes * 60,
+        }
+        self.stale_while_revalidate = CONFIG.cache_stale_while_revalidate
+
+    def get_json(self, session, name: str, url: str, params: dict, timeout: float):
+        """
+        返回 (json, 来源)，来源为 network / cache / revalidated / stale
+        """
+        ttl = self.ttl.get(name, 0)
+        if ttl <= 0:
+            with session.get(url, params=params, timeout=timeout) as r:
+                r.raise_for_status()
+                return r.json(), "network"
+
+        path = self._path(url, params)
+        entry = self._load(path)
+
+        if entry:
+            now = time.time()
+            age = now - entry.get("stored_at", 0)
+            # 跨天的数据（比如昨天的 3 天预报）即使还在新鲜期内也不能用：
+            # 0 点刷新要画的是今天的预报
+            same_day = (datetime.date.fromtimestamp(entry.get("stored_at", 0))
+                        == datetime.date.fromtimestamp(now))
+            if age < ttl and same_day:
+                return entry["payload"], "cache"
+
+            if (self.stale_while_revalidate
+                    and age < ttl * STALE_FACTOR
+                    and same_day):
+                self._revalidate_in_background(session, url, params, timeout, path, entry)
+                return entry["payload"], "stale"
+
+        new_entry = self._fetch(session, url, params, timeout, path, entry)
+        source = "revalidated" if new_entry is entry else "network"
+        return new_entry["payload"], source
+
+    def wait(self):
+        """等待后台更新结束（一次性进程退出前调用）"""
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+def build_response_cache() -> ResponseCache:
+    """按当前配置创建响应缓存"""
+    cache = ResponseCache(ttl={})
+    cache.reload_config()
+    return cache
@@ -0,0 +1,347 @@
+# app/layout.py
+"""
+声明式画面布局
+
+布局写在 layout/<name>.json 里：画布大小、区域、字体、字形集、CPU 核心布局，
+以及按图层（base / weather / metrics）排列的元素。元素只描述“画什么、画在哪、绑定哪个数据”：
+
+- image:        贴一张素材，key 可以带 {绑定名} 模板，如 "{weekday}.png"
+- text:         按字形集逐字贴素材图片，advance 为固定步长或 "width"（按图片宽度）
+- font_text:    用字体逐字绘制（字形缓存），direction 为 vertical 时竖排
+- wrapped_text: 分钟降水那种按字符宽度居中、超宽换行的文字
+- bars:         每个 CPU 核心一根占用率柱，按 buckets 选图
+
+通用字段：
+- by_length:  按绑定值的长度覆盖 x / y / step 等参数（替代原来按字符串长度的 if 分支）
+- align:      在 box 范围内居中（固定步长的文字）
+- suffix:     文字后面紧跟的单位图片
+- when:       条件（min_length / equals / not_equals）
+- region:     元素所属区域（如 metrics），单独重画该区域时只执行这些元素
+
+加载时编译一次：每个元素变成一个闭包，静态素材预先从图集取好，
+渲染时按图层顺序依次调用，不再解释布局。
+
+渲染模式：
+- "1":   直接在 1 bit 画布上渲染。素材在编译时按 bitmap 段的策略二值化一次
+         （dither: 改用抖动的素材通配符；thresholds: 按素材通配符覆盖阈值），
+         字形用预先二值化的蒙版，每帧不再做颜色转换和二值化
+- "rgb": 原来的 RGB 画布，推送前再整帧二值化（对照 / 调试用）
+"""
+import json
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+from PIL import Image
+
+from app.utils import resource_path
+
+LAYOUT_DIR = resource_path("layout")
+DEFAULT_LAYOUT = "default"
+
+LAYERS = ("base", "weather", "metrics")
+
+RENDER_MODES = ("1", "rgb")
+
+
+class Layout:
+    def __init__(self, spec: dict, atlas, mode: str = "rgb", threshold: int = 128):
+        if mode not in RENDER_MODES:
+            raise ValueError(f"不支持的渲染模式: {mode}")
+        self.spec = spec
+        self.mode = mode
+        self.threshold = threshold
+        self.name = spec["name"]
+        self.version = spec["version"]
+        self.size = tuple(spec["size"])
+        self.background = tuple(spec["background"])
+
+        if mode == "1":
+            from app.assets import BitmapAtlas
+
+            bitmap = spec.get("bitmap", {})
+            self.atlas = BitmapAtlas(atlas, threshold, bitmap.get("dither", ()), bitmap.get("thresholds"))
+            gray = Image.new("RGB", (1, 1), self.background).convert("L").getpixel((0, 0))
+            self.background_fill = 255 if gray >= threshold else 0
+        else:
+            self.atlas = atlas
+            self.background_fill = self.background
+        self.regions = {name: tuple(box) for name, box in spec.get("regions", {}).items()}
+        self.fonts = {name: tuple(font) for name, font in spec.get("fonts", {}).items()}
+        self.glyph_sets = spec.get("glyph_sets", {})
+
+        self.cpu_layouts = {}
+        for cores, item in spec.get("cpu_layouts", {}).items():
+            self.cpu_layouts[cores] = {
+                "cpu_frame": item["frame"],
+                "cpu_bars": item["bars"],
+                "cpu_step": item["step"],
+                "cpu_extra": {int(i): v for i, v in item.get("extra", {}).items()},
+            }
+
+        # 编译：每个图层是 [(region, draw(image, ctx)), ...]
+        self._ops = {
+            layer: [(el.get("region"), self._compile(el)) for el in spec["layers"].get(layer, [])]
+            for layer in LAYERS
+        }
+
+    # ================== 执行 ==================
+    def new_image(self) -> Image.Image:
+        if self.mode == "1":
+            return Image.new("1", self.size, color=self.background_fill)
+        return Image.new("RGB", self.size, color=self.background)
+
+    def cpu_layout(self, cpu_count: int) -> dict:
+        """按核心数取核心框 / 核心柱 / 柱间距"""
+        return self.cpu_layouts.get(str(cpu_count)) or self.cpu_layouts["default"]
+
+    def draw(self, image: Image.Image, layer: str, ctx: dict, region: str = None):
+        """按顺序执行一个图层的绘制操作；给了 region 时只执行该区域的元素"""
+        for op_region, op in self._ops[layer]:
+            if region is None or op_region == region:
+                op(image, ctx)
+
+    # ================== 编译 ==================
+    def _compile(self, el: dict):
+        compiler = {
+            "image": self._compile_image,
+            "text": self._compile_text,
+            "font_text": self._compile_font_text,
+            "wrapped_text": self._compile_wrapped_text,
+            "bars": self._compile_bars,
+        }.get(el["type"])
+        if compiler is None:
+            raise ValueError(f"未知的布局元素类型: {el['type']}")
+
+        op = compiler(el, self._compile_params(el))
+        when = self._compile_when(el.get("when"))
+        if when is None:
+            return op
+
+        def guarded(image, ctx):
+            if when(ctx):
+                op(image, ctx)
+        return guarded
+
+    @staticmethod
+    def _compile_params(el: dict):
+        """
+        返回 params(ctx) -> dict；有 by_length 时按绑定值长度预先合并好各分支的参数
+        """
+        by_length = el.get("by_length")
+        if by_length is None:
+            return lambda ctx: el
+
+        bind = by_length.get("bind", el.get("bind"))
+        cases = {int(n): {**el, **case} for n, case in by_length.get("cases", {}).items()}
+        default = {**el, **by_length.get("default", {})}
+        return lambda ctx: cases.get(len(ctx[bind]), default)
+
+    @staticmethod
+    def _compile_when(when: dict):
+        if when is None:
+            return None
+        bind = when["bind"]
+        if "min_length" in when:
+            n = when["min_length"]
+            return lambda ctx: len(ctx[bind]) >= n
+        if "equals" in when:
+            value = when["equals"]
+            return lambda ctx: ctx[bind] == value
+        if "not_equals" in when:
+            value = when["not_equals"]
+            return lambda ctx: ctx[bind] != value
+        raise ValueError(f"不支持的布局条件: {when}")
+
+    def _compile_image(self, el: dict, params):
+        key = el["key"]
+        atlas = self.atlas
+
+        if "{" not in key and "by_length" not in el:
+            # 完全静态：素材和位置都在编译时确定
+            image_static = atlas.get(key)
+            xy = (el["x"], el["y"])
+            return lambda image, ctx: image.paste(image_static, xy)
+
+        def draw(image, ctx):
+            p = params(ctx)
+            image.paste(atlas.get(key.format(**ctx)), (p["x"], p["y"]))
+        return draw
+
+    def _glyph_key(self, glyph_set: str):
+        """字符 → 素材 key（带缓存）"""
+        spec = self.glyph_sets[glyph_set]
+        template = spec["template"]
+        mapping = dict(spec.get("map", {}))
+        other = spec.get("other")
+
+        def key_for(ch: str) -> str:
+            key = mapping.get(ch)
+            if key is None:
+                key = template.format(char=ch) if other is None or ch.isdigit() else other
+                mapping[ch] = key
+            return key
+        return key_for
+
+    def _compile_text(self, el: dict, params):
+        atlas = self.atlas
+        bind = el["bind"]
+        key_for = self._glyph_key(el["glyphs"])
+        advance = el["advance"]
+        by_width = advance == "width"
+
+        align = el.get("align")
+        if align is not None:
+            if align.get("mode", "center") != "center":
+                raise ValueError(f"不支持的对齐方式: {align['mode']}")
+            box_start, box_end = align["box"]
+            box_width = box_end - box_start
+            extra = align.get("extra", 0)
+
+        suffix = el.get("suffix")
+        if suffix is not None:
+            suffix_key = suffix["key"]
+            suffix_gap = suffix.get("gap", 0)
+
+        def draw(image, ctx):
+            value = ctx[bind]
+            p = params(ctx)
+            if align is not None:
+                x = box_start + (box_width - (advance * len(value) + extra)) // 2
+            else:
+                x = p["x"]
+            y = p["y"]
+
+            for ch in value:
+                glyph = atlas.get(key_for(ch))
+                image.paste(glyph, (x, y))
+                x += glyph.width if by_width else advance
+
+            if suffix is not None:
+                image.paste(atlas.get(suffix_key), (x + suffix_gap, y))
+        return draw
+
+    def _compile_font_text(self, el: dict, params):
+        from app.fonts import get_glyph_cache
+
+        glyphs = get_glyph_cache(*self.fonts[el["font"]])
+        bind = el["bind"]
+        vertical = el.get("direction") == "vertical"
+        threshold = self.threshold
+
+        def draw(image, ctx):
+            p = params(ctx)
+            x, y = p["x"], p["y"]
+            step = p["step"]
+            for ch in ctx[bind]:
+                glyphs.draw(image, (x, y), ch, threshold=threshold)
+                if vertical:
+                    y += step
+                else:
+                    x += step
+        return draw
+
+    def _compile_wrapped_text(self, el: dict, params):
+        from app.fonts import get_glyph_cache
+
+        glyphs = get_glyph_cache(*self.fonts[el["font"]])
+        bind = el["bind"]
+        threshold = self.threshold
+
+        def draw(image, ctx):
+            p = params(ctx)
+            text = ctx[bind]
+
+            # 行数向上取整；整除时保持浮点（坐标小数部分会影响字形光栅化，与原实现一致）
+            lines = len(text) / p["line_chars"]
+            if lines != int(lines):
+                lines = int(lines) + 1
+            y = p["center_y"] - ((lines * p["line_height"]) / 2)
+
+            digits = len([ch for ch in text if ch.isdigit()])
+            others = len(text.translate(str.maketrans('', '', '0123456789')))
+            x = p["center_x"] - ((digits * p["digit_width"] + others * p["char_width"]) / 2)
+            if x < p["min_x"]:
+                x = 0
+
+            pos = 0
+            for ch in text:
+                pos += p["advance"]
+                if pos > p["wrap_after"]:
+                    pos = p["wrap_offset"]
+                    x = p["wrap_x"]
+                    y += p["line_height"]
+                glyphs.draw(image, (x + pos, y), ch, threshold=threshold)
+                if ch.isdigit():
+                    pos -= p["digit_kern"]
+        return draw
+
+    def _compile_bars(self, el: dict, params):
+        atlas = self.atlas
+        bind = el["bind"]
+        key = el["key"]
+        limit = el["limit"]
+        default = el["default"]
+        buckets = [(op == "<=", bound, label) for op, bound, label in el["buckets"]]
+
+        def bucket_for(value) -> str:
+            for inclusive, bound, label in buckets:
+                if value < bound or (inclusive and value == bound):
+                    return label
+            return default
+
+        def draw(image, ctx):
+            p = params(ctx)
+            x, y = p["x"], p["y"]
+            step = ctx["cpu_step"]
+            extra = ctx["cpu_extra"]
+            for i, value in enumerate(ctx[bind]):
+                image.paste(atlas.get(key.format(bucket=bucket_for(value), **ctx)), (x, y))
+                if i == limit - 1:
+                    break
+                x += step + extra.get(i, 0)
+        return draw
+
+
+def layout_path(name: str) -> Path:
+    """布局名（layout/ 下的文件名）或 .json 文件路径"""
+    if name.endswith(".json"):
+        return Path(name).expanduser()
+    return LAYOUT_DIR / f"{name}.json"
+
+
+_layout_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _load_layout(name: str, mode: str, threshold: int) -> Layout:
+    from app.assets import get_atlas
+
+    with open(layout_path(name), "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    return Layout(spec, get_atlas(), mode, threshold)
+
+
+def get_layout(name: str = None, mode: str = None, threshold: int = None) -> Layout:
+    """
+    取编译好的布局（每个 (布局, 渲染模式, 阈值) 只编译一次）
+    参数为空时用配置里的 display.layout / display.render_mode / display.threshold，
+    布局文件有问题时退回默认布局
+    """
+    if name is None or mode is None or threshold is None:
+        from app.config import CONFIG
+        name = name or CONFIG.display_layout or DEFAULT_LAYOUT
+        mode = mode or CONFIG.display_render_mode
+        threshold = threshold or CONFIG.display_threshold
+    if mode not in RENDER_MODES:
+        print(f"[Layout] 不支持的渲染模式 {mode}，使用 rgb")
+        mode = "rgb"
+
+    with _layout_lock:
+        try:
+            return _load_layout(name, mode, threshold)
+        except Exception as e:
+            if name == DEFAULT_LAYOUT:
+                raise
+            print(f"[Layout] 布局 {name} 加载失败，使用默认布局: {e}")
+            return _load_layout(DEFAULT_LAYOUT, mode, threshold)
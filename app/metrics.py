@@ -0,0 +1,130 @@
+# app/metrics.py
+"""
+系统指标采集（CPU / 内存），供画面渲染使用
+
+CPU 占用率由后台采样线程持续采集：每 0.5 秒取一次总占用率和各核心占用率，
+写进固定大小的环形数组（最近 2 秒），渲染时直接取窗口平均值，不再阻塞等待。
+采样线程没启动时退回原来的 cpu_percent(interval=2) 阻塞采样。
+"""
+import threading
+
+import psutil
+
+# 采样间隔与平滑窗口（秒）
+SAMPLE_SECONDS = 0.5
+WINDOW_SECONDS = 2.0
+
+
+class CpuSampler:
+    def __init__(self, interval: float = SAMPLE_SECONDS, window: float = WINDOW_SECONDS):
+        self.interval = interval
+        self.size = max(int(round(window / interval)), 1)
+        self.cores = psutil.cpu_count()
+
+        # 环形数组：第 i 个槽位是一次采样的总占用率 / 各核心占用率
+        self._total = [0.0] * self.size
+        self._per_cpu = [[0.0] * self.cores for _ in range(self.size)]
+        self._index = 0
+        self._count = 0
+
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        # 第一次调用只建立基准（psutil 返回 0.0），之后每次返回距上次的占用率
+        psutil.cpu_percent(None)
+        psutil.cpu_percent(None, percpu=True)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cpu-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self):
+        total = psutil.cpu_percent(None)
+        per_cpu = psutil.cpu_percent(None, percpu=True)
+        with self._lock:
+            self._total[self._index] = total
+            slot = self._per_cpu[self._index]
+            if len(per_cpu) == len(slot):
+                slot[:] = per_cpu
+            else:
+                self._per_cpu[self._index] = list(per_cpu)
+            self._index = (self._index + 1) % self.size
+            self._count = min(self._count + 1, self.size)
+        self._ready.set()
+
+    def snapshot(self) -> tuple:
+        """
+        窗口内的平均占用率 (总占用率, [各核心占用率])
+        刚启动还没有采样时最多等一个采样间隔
+        """
+        self._ready.wait(self.interval * 2)
+        with self._lock:
+            n = self._count
+            if n == 0:
+                return 0.0, [0.0] * self.cores
+            # 最近 n 个槽位（未写满时只有前 n 个有效）
+            slots = [(self._index - 1 - i) % self.size for i in range(n)]
+            total = sum(self._total[i] for i in slots) / n
+            per_cpu = [
+                sum(self._per_cpu[i][core] for i in slots) / n
+                for core in range(len(self._per_cpu[slots[0]]))
+            ]
+        # 与 psutil 一致保留 1 位小数
+        return round(total, 1), [round(v, 1) for v in per_cpu]
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler() -> CpuSampler:
+    """进程内共享的 CPU 采样器"""
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = CpuSampler()
+        return _sampler
+
+
+def start_sampler() -> CpuSampler:
+    """启动后台 CPU 采样（常驻进程启动时、一次性刷新开始拉取前调用）"""
+    sampler = get_sampler()
+    sampler.start()
+    return sampler
+
+
+def collect_metrics(interval: float = 2) -> dict:
+    """
+    采集一次系统指标
+    interval: 后台采样未启动时，总 CPU 占用率的阻塞采样时长（秒）
+    """
+    sampler = _sampler
+    if sampler is not None and sampler.running:
+        cpu_total, per_cpu = sampler.snapshot()
+    else:
+        cpu_total = psutil.cpu_percent(interval=interval)
+        per_cpu = psutil.cpu_percent(percpu=True)
+    mem = psutil.virtual_memory()
+
+    return {
+        "cpu_percent": cpu_total,
+        "per_cpu": per_cpu,
+        "cpu_count": psutil.cpu_count(),
+        "mem_total": mem.total,
+        "mem_percent": mem.percent,
+    }
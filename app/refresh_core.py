@@ -5,14 +5,72 @@ import sys
 import time
 
 
-def fetch_weather():
+def fetch_weather(force: bool = False):
+    """
+    执行单次刷新（force=True 时即使画面没变也重新发送到墨水屏）
+
+    - refresh.mode = subprocess（默认）: 每次启动独立子进程，隔离性最好，90 秒超时
+    - refresh.mode = worker: 常驻的预热工作进程，保留隔离又省掉冷启动，同样 90 秒超时
+    - refresh.mode = inprocess: 托盘进程内的刷新引擎，复用会话 / 句柄；
+      没有进程隔离，卡住的 HID 写入无法强行中断（刷新队列的任务超时只能把队列放行），
+      所以需要手动开启
+
+    刷新路径都是无界面的：失败时抛 RefreshError（带错误码），
+    key / location 未配置时错误码为 missing_config，由托盘打开设置窗口填写
+    """
+    from app.config import CONFIG
+    from app.refresh_errors import MISSING_CONFIG, RefreshError, classify_error
+
+    # 设置窗口是独立进程，保存后这里要重新读一次
+    CONFIG.reload()
+
+    if not CONFIG.weather_key or not CONFIG.location:
+        raise RefreshError(MISSING_CONFIG, "未填写和风天气 API key 或城市")
+
+    if CONFIG.refresh_mode == "inprocess":
+        from app.refresh_engine import get_engine
+        try:
+            return get_engine().run(force=force)
+        except Exception as e:
+            raise classify_error(e) from e
+
+    if CONFIG.refresh_mode == "worker":
+        from app.refresh_worker import get_worker
+        return get_worker().run_job(force=force)
+
+    return fetch_weather_subprocess(force=force)
+
+
+def refresh_metrics():
+    """
+    系统指标快速刷新（只重画 CPU / 内存区，沿用上一帧的天气画面，不联网）
+    只有常驻的刷新引擎 / 工作进程保留着上一帧；子进程模式不支持，返回 None
+    刷新引擎正忙（完整刷新进行中）时同样跳过，返回 None
+    """
+    from app.config import CONFIG
+
+    if CONFIG.refresh_mode == "inprocess":
+        from app.refresh_engine import get_engine
+        return get_engine().run_metrics()
+
+    if CONFIG.refresh_mode == "worker":
+        from app.refresh_worker import get_worker
+        return get_worker().run_job(job_type="metrics")
+
+    return None
+
+
+def fetch_weather_subprocess(force: bool = False):
     """
     执行单次刷新子进程。
 
     关键点：
     - 不直接 subprocess legacy/update_weather.py（打包后容易参数解释异常）
     - 统一调用主程序的 --refresh-worker 模式，避免递归启动托盘
+    - 子进程输出了结构化结果时按错误码抛 RefreshError
     """
+    from app.refresh_errors import WORKER, RefreshError, parse_result_line
+
     start = time.time()
 
     # 开发环境与打包环境参数不同：
@@ -24,6 +82,9 @@ def fetch_weather():
         project_root = Path(__file__).resolve().parent.parent
         cmd = [sys.executable, str(project_root / "main.py"), "--refresh"]
 
+    if force:
+        cmd.append("--force")
+
     result = subprocess.run(
         cmd,
         stdout=subprocess.PIPE,
@@ -33,15 +94,19 @@ def fetch_weather():
     )
 
     if result.returncode != 0:
-        raise RuntimeError(
-            "刷新脚本执行失败\n"
+        detail = (
             f"STDOUT:\n{result.stdout}\n"
             f"STDERR:\n{result.stderr}\n"
             f"EXIT_CODE: {result.returncode}"
         )
+        reply = parse_result_line(result.stdout)
+        if reply is not None:
+            raise RefreshError.from_dict(reply, detail)
+        raise RefreshError(WORKER, "刷新脚本执行失败", detail)
 
     return {
         "duration": round(time.time() - start, 2),
+        "mode": "subprocess",
         "stdout": result.stdout,
     }
 
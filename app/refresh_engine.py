@@ -0,0 +1,139 @@
+# app/refresh_engine.py
+"""
+进程内刷新引擎
+
+在托盘进程里常驻，复用 HTTP 会话、响应缓存和已打开的 HID 句柄，
+省掉每次刷新都要冷启动解释器、重新 import requests / PIL / hid 的开销。
+子进程模式（main.py --refresh）仍保留，作为隔离兜底。
+"""
+import threading
+import time
+
+
+class RefreshEngine:
+    def __init__(self):
+        # 延迟导入：只有真正走进程内刷新时才加载这些重量级模块
+        import requests
+        from app.http_cache import build_response_cache
+        from app.assets import get_atlas
+        from app.fonts import preload_glyphs
+        from app.metrics import start_sampler
+
+        self._lock = threading.Lock()
+        self.session = requests.Session()
+        self.cache = build_response_cache()
+        self.output = None
+        # 上一次完整刷新的画面，指标快速刷新在它上面只重画 CPU / 内存区
+        self.last_image = None
+        # CPU 占用率后台持续采样，刷新时直接取最近 2 秒的平均值
+        start_sampler()
+
+        # 常驻进程里一次性解码全部素材，之后每帧只从内存贴图
+        start = time.time()
+        count = get_atlas().preload()
+        preload_glyphs()
+        print(f"[RefreshEngine] 素材预加载 {count} 张（含常用字形），耗时 {round(time.time() - start, 2)}s")
+
+    def _select_output(self, multi_device: bool):
+        """按配置选择单屏 / 多屏输出，切换时释放另一边占用的设备"""
+        from app.display_output import get_display_output
+        from app.display_fanout import get_fanout_output
+
+        output = get_fanout_output() if multi_device else get_display_output()
+        if self.output is not None and self.output is not output:
+            self.output.close()
+        self.output = output
+        return output
+
+    def run(self, force: bool = False) -> dict:
+        """
+        执行一次完整刷新：拉取 → 渲染 → 推送
+        画面与上次成功发送的一致时跳过 HID 传输，force=True 时总是发送；
+        墨水屏不在时画面排队，设备插入后自动推送，本次刷新不算失败
+        """
+        from app.config import CONFIG
+        from app.weather_api import fetch_weather_data, print_weather_summary
+        from app.metrics import collect_metrics
+        from app.render import render_frame
+        from app.framebuffer import pack_frame
+        from app.debug_snapshot import save_snapshot
+
+        with self._lock:
+            start = time.time()
+
+            self.cache.reload_config()
+
+            weather = fetch_weather_data(self.session, CONFIG.weather_key, CONFIG.location, cache=self.cache)
+            print_weather_summary(weather)
+
+            metrics = collect_metrics()
+            new_image = render_frame(weather, metrics)
+            print('创建图片')
+            self.last_image = new_image
+
+            # 画面直接在内存里打包推送；快照（调试用）由后台线程写盘
+            frame = pack_frame(new_image, CONFIG.display_threshold)
+            save_snapshot(new_image, CONFIG.display_debug_snapshot)
+            display = self._select_output(CONFIG.display_multi_device)
+            output = display.submit(frame, force=force)
+
+            result = {
+                "duration": round(time.time() - start, 2),
+                "mode": "inprocess",
+                "fetch_duration": weather["duration"],
+                "pushed": output == "pushed",
+                "output": output,
+            }
+            if CONFIG.display_multi_device:
+                result["devices"] = {repr(path): item for path, item in display.last_report.items()}
+            return result
+
+    def run_metrics(self) -> dict | None:
+        """
+        系统指标快速刷新：沿用上一帧的天气画面，只重画 CPU / 内存区，不联网；
+        推送仍是整帧（77 包），开销见 python -m bench.render
+        还没有完整刷新过、或完整刷新正在进行时跳过，返回 None
+        """
+        from app.config import CONFIG
+        from app.metrics import collect_metrics
+        from app.render import render_metrics
+        from app.framebuffer import pack_frame
+        from app.debug_snapshot import save_snapshot
+
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            if self.last_image is None:
+                return None
+            start = time.time()
+
+            new_image = render_metrics(self.last_image, collect_metrics())
+            self.last_image = new_image
+
+            frame = pack_frame(new_image, CONFIG.display_threshold)
+            save_snapshot(new_image, CONFIG.display_debug_snapshot)
+            display = self._select_output(CONFIG.display_multi_device)
+            output = display.submit(frame)
+
+            return {
+                "duration": round(time.time() - start, 3),
+                "mode": "inprocess",
+                "kind": "metrics",
+                "pushed": output == "pushed",
+                "output": output,
+            }
+        finally:
+            self._lock.release()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> RefreshEngine:
+    """托盘进程内共享的刷新引擎（首次使用时创建）"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = RefreshEngine()
+        return _engine
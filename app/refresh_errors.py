@@ -0,0 +1,66 @@
+# app/refresh_errors.py
+"""
+刷新失败的结构化结果
+
+刷新路径（进程内引擎 / 工作进程 / 子进程）都是无界面的，不弹窗；
+失败时统一成带错误码的 RefreshError 交回托盘，由托盘决定通知用户还是打开设置窗口。
+子进程通过 stdout 里以 RESULT_PREFIX 开头的一行 JSON 把错误传回来。
+"""
+import json
+
+# 错误码
+MISSING_CONFIG = "missing_config"   # 没有填写 key / location，需要打开设置窗口
+NETWORK = "network"                 # 网络请求失败
+BAD_CONFIG = "bad_config"           # key / location 不正确（接口返回的数据不完整）
+WORKER = "worker"                   # 工作进程 / 子进程本身出问题
+DEVICE = "device"                   # 墨水屏未连接 / 写入失败（子进程不排队等设备）
+UNKNOWN = "unknown"
+
+RESULT_PREFIX = "[RefreshResult] "
+
+# 刷新子进程因 RefreshError 退出时的返回码
+EXIT_REFRESH_ERROR = 3
+
+
+class RefreshError(RuntimeError):
+    def __init__(self, code: str, message: str, detail: str = ""):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.detail = detail
+
+    def to_dict(self) -> dict:
+        return {"ok": False, "code": self.code, "error": self.message}
+
+    @classmethod
+    def from_dict(cls, data: dict, detail: str = "") -> "RefreshError":
+        return cls(data.get("code", UNKNOWN), data.get("error", ""), detail)
+
+    def to_line(self) -> str:
+        """子进程输出给父进程的一行结果"""
+        return RESULT_PREFIX + json.dumps(self.to_dict(), ensure_ascii=False)
+
+
+def parse_result_line(output: str) -> dict | None:
+    """从子进程输出里找出结果行，没有时返回 None"""
+    for line in reversed(output.splitlines()):
+        if line.startswith(RESULT_PREFIX):
+            try:
+                return json.loads(line[len(RESULT_PREFIX):])
+            except ValueError:
+                return None
+    return None
+
+
+def classify_error(e: Exception, detail: str = "") -> RefreshError:
+    """把刷新过程中的异常归类成 RefreshError（提示文字与原脚本的弹窗一致）"""
+    if isinstance(e, RefreshError):
+        return e
+
+    import requests
+
+    if isinstance(e, requests.exceptions.RequestException):
+        return RefreshError(NETWORK, "请检查网络连接", detail or str(e))
+    if isinstance(e, (KeyError, IndexError, ValueError)):
+        return RefreshError(BAD_CONFIG, "请检查key或location输入是否正确\n" + str(e), detail)
+    return RefreshError(UNKNOWN, f"[{type(e).__name__}] {e}", detail)
@@ -4,15 +4,19 @@ import threading
 import datetime
 import os
 import subprocess
-from app.refresh_core import fetch_weather, update_cache, send_mail
+from app.refresh_core import fetch_weather, refresh_metrics, update_cache, send_mail
+from app.refresh_errors import MISSING_CONFIG, WORKER, RefreshError, classify_error
+from app.refresh_queue import RUNNING, RefreshQueue
 from app.state_file import update_last_refresh_time 
 
 LOG_DIR = Path.home() / ".update-weather"
 LOG_FILE = LOG_DIR / "refresh.log"
 
-_refresh_lock = threading.Lock()
-_refresh_timeout_timer = None
-_is_refreshing = False 
+_queue = None
+_queue_lock = threading.Lock()
+
+# 最近一次完整刷新的结构化结果（托盘 tooltip 显示失败原因）
+_last_result = None
 
 
 def notify_macos(title: str, message: str):
@@ -47,22 +51,35 @@ def _log(msg: str):
         pass
 
 
-def _do_refresh():
-    global _refresh_timeout_timer, _is_refreshing
+def get_last_result() -> dict | None:
+    """最近一次完整刷新的结果 {"ok", "code", "error", "time"}，还没刷新过时为 None"""
+    return _last_result
+
+
+def _open_settings_for_missing_config():
+    """key / location 未填写：打开设置窗口（填写只在 gui_process 里进行）"""
+    from app.gui_launcher import launch_gui_process
+
+    def on_exit():
+        from app.scheduler import notify_scheduler
+        notify_scheduler("settings_closed")
+
+    threading.Thread(target=launch_gui_process, kwargs={"on_exit": on_exit}, daemon=True).start()
 
-    _is_refreshing = True  # ← 用全局标志
 
-    # 启动超时定时器（30 秒后强制释放锁）
-    def timeout_release():
-        _log("警告：刷新超时 30 秒，强制释放锁")
-        if _refresh_lock.locked():
-            _refresh_lock.release()
+def _do_refresh(job):
+    """完整刷新任务（刷新队列的执行线程里运行，同一时间只有一个）"""
+    global _last_result
 
-    _refresh_timeout_timer = threading.Timer(30.0, timeout_release)
-    _refresh_timeout_timer.start()
+    wait_ms = round(job.wait_seconds * 1000)
+    _log(f"开始刷新 #{job.id}（来源: {', '.join(job.sources)}，排队 {wait_ms}ms）")
 
     try:
-        fetch_weather()
+        result = fetch_weather(force=job.force)
+        if result.get("output") == "queued":
+            _log("墨水屏未连接，画面已排队，设备插入后自动推送")
+        elif result.get("output") == "no_device":
+            _log("没有已连接的墨水屏，本次未推送，下次刷新时重新查找")
         update_cache()
         send_mail()
         _log("刷新完成 ✔")
@@ -72,51 +89,85 @@ def _do_refresh():
         now = datetime.datetime.now()
         update_last_refresh_time(now)
         _log(f"最后刷新时间已更新: {now}")
+        _last_result = {"ok": True, "time": now}
+        return result
 
     except Exception as e:
-        _log(f"刷新失败 ✘ {e}")
-        notify_macos("UpdateWeather", "天气刷新失败，请查看日志")
+        error = e if isinstance(e, RefreshError) else classify_error(e)
+        _log(f"刷新失败 ✘ [{error.code}] {error.message}")
+        if error.detail:
+            _log(error.detail)
+        _last_result = {**error.to_dict(), "time": datetime.datetime.now()}
+
+        if error.code == MISSING_CONFIG:
+            notify_macos("UpdateWeather", "请先在设置中填写和风天气 API key 和城市")
+            _open_settings_for_missing_config()
+        else:
+            notify_macos("UpdateWeather", "天气刷新失败，请查看日志")
+        raise error
+
+
+def _do_metrics_refresh(job):
+    """系统指标快速刷新任务；结果只打印不写日志文件，避免高频刷新刷屏"""
+    try:
+        result = refresh_metrics()
+    except Exception as e:
+        _log(f"指标刷新失败 ✘ {e}")
+        raise
 
-    finally:
-        _is_refreshing = False
-        if _refresh_timeout_timer:
-            _refresh_timeout_timer.cancel()
-        if _refresh_lock.locked():
-            _refresh_lock.release()
-        _log("刷新锁已释放")
+    if result is not None:
+        print(f"[Metrics] 指标刷新 {result['output']}，耗时 {round(result['duration'] * 1000)}ms")
+    return result
 
 
-def run_refresh_async():
-    """
-    异步刷新 - 带去重控制
-    """
-    global _is_refreshing
-    
-    # 首先检查是否已在执行
-    if _is_refreshing:
-        _log("⚠️ 刷新已在进行中，忽略本次请求")
-        notify_macos("UpdateWeather", "刷新正在进行中，请稍候...")
-        return
-    
-    try:
-        # 尝试获取锁，最多等 2 秒
-        if not _refresh_lock.acquire(timeout=2):
-            _log("⚠️ 刷新请求被拒：已有刷新执行超过 2 秒")
-            notify_macos("UpdateWeather", "刷新正在进行中，请稍候...")
-            return
+def _on_job_timeout(job):
+    """任务超时（刷新路径卡住）：记为失败，托盘 tooltip 显示原因"""
+    global _last_result
 
-        _log("✓ 锁获取成功，开始刷新")
+    _log(f"刷新任务 #{job.id} 失败 ✘ {job.error}")
+    if job.kind == "refresh":
+        error = RefreshError(WORKER, "刷新超时，请查看日志")
+        _last_result = {**error.to_dict(), "time": datetime.datetime.now()}
+        notify_macos("UpdateWeather", "天气刷新超时，请查看日志")
 
-        def runner():
-            try:
-                _do_refresh()
-            except Exception as e:
-                _log(f"❌ 刷新线程异常: {e}")
-            finally:
-                if _refresh_lock.locked():
-                    _refresh_lock.release()
 
-        threading.Thread(target=runner, daemon=True).start()
+def get_refresh_queue():
+    """托盘进程内唯一的刷新队列"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = RefreshQueue(
+                {"refresh": _do_refresh, "metrics": _do_metrics_refresh},
+                on_timeout=_on_job_timeout,
+            )
+        return _queue
 
-    except Exception as e:
-        _log(f"❌ 刷新启动失败: {e}")
\ No newline at end of file
+
+def run_metrics_refresh():
+    """
+    系统指标快速刷新（提交到刷新队列，耗时很短）
+    完整刷新排队或执行中时丢弃（完整刷新会一起重画指标区）
+    """
+    return get_refresh_queue().submit("metrics", "metrics")[0]
+
+
+def run_refresh_async(force: bool = False, source: str = None):
+    """
+    异步刷新：提交到刷新队列，重复请求合并成一个任务，返回任务对象
+    force: 画面没变也重新发送到墨水屏（手动刷新用）
+    source: 请求来源 manual / config / startup / midnight / scheduled，决定优先级；
+            为空时 force 视为手动刷新，否则为定时刷新
+    """
+    if source is None:
+        source = "manual" if force else "scheduled"
+
+    job, merged = get_refresh_queue().submit("refresh", source, force=force)
+    if not merged:
+        _log(f"✓ 刷新任务 #{job.id} 已排队（来源: {source}）")
+    elif job.state == RUNNING:
+        _log(f"⚠️ 刷新 #{job.id} 已在进行中，本次请求（{source}）并入其中")
+        if source == "manual":
+            notify_macos("UpdateWeather", "刷新正在进行中，请稍候...")
+    else:
+        _log(f"刷新任务 #{job.id} 已在排队，本次请求（{source}）已合并")
+    return job
@@ -0,0 +1,260 @@
+# app/refresh_queue.py
+"""
+刷新任务队列
+
+托盘点击、定时刷新、0 点刷新、配置变更、系统指标快速刷新都只是往队列里提交任务，
+由唯一的执行线程按优先级逐个执行，同一时间最多一个刷新在跑：
+
+- 合并：同类任务最多一个在排队，重复提交并入这一个（来源记在 sources 里，force 取或）；
+  正在执行的完整刷新也会吸收新的请求（托盘连点不会重复拉取），
+  但配置变更（要用新配置重新拉取）和强制刷新（执行中的任务已按非强制开始拉取）
+  会在执行中的刷新之后再排一次
+- 优先级：手动刷新 > 配置变更 > 启动 / 0 点 / 唤醒补刷 > 定时刷新 > 系统指标刷新；
+  排队中的任务被更高优先级的请求合并时随之提升
+- 系统指标刷新在完整刷新排队或执行时直接丢弃（完整刷新会一起重画指标区）
+- 每个任务有明确的状态 queued → running → done / failed，并记录排队等待时间
+
+不再用锁 + 30 秒定时器强制释放，改为每个任务一个截止时间：
+handler 在单独的线程里执行，超过 JOB_TIMEOUT 秒没结束就记为 failed，队列继续执行后面的任务。
+卡住的 handler 线程无法强行中断（比如进程内刷新卡在 HID 写入上），
+它结束之前同类任务直接记为 failed，不会再叠加新的线程。
+子进程 / 工作进程模式自己还有 90 秒超时，会先于这里触发。
+"""
+import threading
+import time
+
+# 任务状态
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# 请求来源 → 优先级（数字越小越先执行）
+PRIORITIES = {
+    "manual": 0,
+    "config": 1,
+    "startup": 2,
+    "midnight": 2,
+    "resume": 2,
+    "scheduled": 3,
+    "metrics": 9,
+}
+
+# 执行中也要重新排队的来源
+RERUN_SOURCES = ("config",)
+
+# 单个任务的截止时间（秒）；比子进程 / 工作进程的 90 秒长，让它们的超时先触发、带上更具体的错误
+JOB_TIMEOUT = 120
+
+
+class RefreshJob:
+    def __init__(self, job_id: int, kind: str, source: str, force: bool):
+        self.id = job_id
+        self.kind = kind
+        self.sources = [source]
+        self.priority = PRIORITIES.get(source, PRIORITIES["scheduled"])
+        self.force = force
+        self.state = QUEUED
+        self.result = None
+        self.error = None
+
+        self.queued_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self._done = threading.Event()
+
+    def merge(self, source: str, force: bool):
+        """并入一个重复请求"""
+        self.sources.append(source)
+        self.priority = min(self.priority, PRIORITIES.get(source, PRIORITIES["scheduled"]))
+        self.force = self.force or force
+
+    @property
+    def wait_seconds(self) -> float | None:
+        """排队等待时间"""
+        if self.started_at is None:
+            return None
+        return self.started_at - self.queued_at
+
+    @property
+    def run_seconds(self) -> float | None:
+        if self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def wait(self, timeout: float = None) -> bool:
+        """等任务结束（done / failed），超时返回 False"""
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "sources": list(self.sources),
+            "priority": self.priority,
+            "force": self.force,
+            "state": self.state,
+            "wait": self.wait_seconds,
+            "duration": self.run_seconds,
+            "error": self.error,
+        }
+
+
+class RefreshQueue:
+    def __init__(self, handlers: dict, timeout: float = JOB_TIMEOUT, on_timeout=None):
+        """
+        handlers: {任务类型: handler(job)}，handler 的返回值记为 job.result，抛异常记为 failed
+        timeout: 单个任务的截止时间（秒），超时记为 failed
+        on_timeout: 任务超时时的回调 on_timeout(job)（在执行线程里调用）
+        """
+        self.handlers = handlers
+        self.timeout = timeout
+        self.on_timeout = on_timeout
+        # 超时后仍在运行的 handler 线程 {任务类型: thread}
+        self._stuck = {}
+        self._cond = threading.Condition()
+        self._pending = {}
+        self._running = None
+        self._next_id = 0
+        self._thread = None
+
+        # 统计：执行过的任务数、被合并的请求数、排队等待时间
+        self.completed = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.timed_out = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.last_job = None
+
+    @property
+    def running(self) -> RefreshJob | None:
+        return self._running
+
+    def submit(self, kind: str, source: str, force: bool = False) -> tuple:
+        """
+        提交任务，返回 (job, merged)
+        merged 为 True 表示并入了已有的排队 / 执行中的任务；系统指标刷新被丢弃时 job 为 None
+        """
+        with self._cond:
+            running = self._running
+
+            if kind == "metrics" and (
+                "refresh" in self._pending or (running is not None and running.kind == "refresh")
+            ):
+                self.dropped += 1
+                return None, False
+
+            if (
+                running is not None
+                and running.kind == kind
+                and kind not in self._pending
+                and source not in RERUN_SOURCES
+                and (running.force or not force)
+            ):
+                running.merge(source, force)
+                self.coalesced += 1
+                return running, True
+
+            job = self._pending.get(kind)
+            if job is not None:
+                job.merge(source, force)
+                self.coalesced += 1
+                return job, True
+
+            self._next_id += 1
+            job = RefreshJob(self._next_id, kind, source, force)
+            self._pending[kind] = job
+            if kind == "refresh":
+                # 完整刷新会一起重画指标区，排队中的指标刷新作废
+                self._drop_pending("metrics")
+            self._ensure_thread()
+            self._cond.notify()
+            return job, False
+
+    def _drop_pending(self, kind: str):
+        job = self._pending.pop(kind, None)
+        if job is not None:
+            self.dropped += 1
+            job.state = DONE
+            job._done.set()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="refresh-queue", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                job = min(self._pending.values(), key=lambda j: (j.priority, j.id))
+                del self._pending[job.kind]
+                job.state = RUNNING
+                job.started_at = time.monotonic()
+                self._running = job
+
+            state = self._execute(job)
+
+            with self._cond:
+                job.state = state
+                job.finished_at = time.monotonic()
+                self._running = None
+                self.completed += 1
+                self.total_wait += job.wait_seconds
+                self.max_wait = max(self.max_wait, job.wait_seconds)
+                self.last_job = job
+            job._done.set()
+
+    def _execute(self, job: RefreshJob) -> str:
+        """在单独的线程里执行 handler，最多等 timeout 秒，返回任务状态"""
+        stuck = self._stuck.get(job.kind)
+        if stuck is not None:
+            if stuck.is_alive():
+                job.error = "上一次同类任务超时后仍未结束"
+                return FAILED
+            del self._stuck[job.kind]
+
+        outcome = {}
+
+        def target():
+            try:
+                outcome["result"] = self.handlers[job.kind](job)
+            except Exception as e:
+                outcome["error"] = e
+
+        thread = threading.Thread(target=target, name=f"refresh-job-{job.id}", daemon=True)
+        thread.start()
+        thread.join(self.timeout)
+
+        if thread.is_alive():
+            self._stuck[job.kind] = thread
+            self.timed_out += 1
+            job.error = f"超过 {self.timeout} 秒未完成"
+            print(f"[RefreshQueue] 任务 #{job.id}（{job.kind}）{job.error}，标记失败")
+            if self.on_timeout is not None:
+                try:
+                    self.on_timeout(job)
+                except Exception as e:
+                    print(f"[RefreshQueue] 超时回调失败: {e}")
+            return FAILED
+
+        if "error" in outcome:
+            job.error = str(outcome["error"])
+            return FAILED
+        job.result = outcome.get("result")
+        return DONE
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "completed": self.completed,
+                "coalesced": self.coalesced,
+                "dropped": self.dropped,
+                "timed_out": self.timed_out,
+                "pending": [job.to_dict() for job in self._pending.values()],
+                "running": self._running.to_dict() if self._running else None,
+                "avg_wait": self.total_wait / self.completed if self.completed else 0.0,
+                "max_wait": self.max_wait,
+            }
@@ -0,0 +1,177 @@
+# app/refresh_worker.py
+"""
+常驻刷新工作进程
+
+托盘启动时拉起一个长期存活的子进程，提前 import 好 requests / PIL / hid
+并建好刷新引擎；每次刷新只通过 Pipe 发一个任务、收一个结构化结果。
+既保留进程隔离（HID 卡死不会拖死托盘），又省掉每次冷启动解释器。
+子进程崩溃或超时会被杀掉并立即重启。
+"""
+import multiprocessing
+import threading
+import time
+import traceback
+
+from app.refresh_errors import WORKER, RefreshError
+
+# 单次任务超时（秒），与子进程模式保持一致
+JOB_TIMEOUT = 90
+
+
+def _worker_main(conn):
+    """工作进程入口：预热后循环处理任务"""
+    from app.config import CONFIG
+    from app.refresh_engine import RefreshEngine
+    from app.refresh_errors import classify_error
+
+    # 预热：把渲染 / 传输相关模块都加载进来
+    # 加载失败不退出，留到任务里以结构化错误的形式返回
+    try:
+        import app.render  # noqa: F401
+        import app.eink  # noqa: F401
+    except Exception as e:
+        print(f"[RefreshWorker] 预热失败: {e}")
+
+    engine = RefreshEngine()
+    print("[RefreshWorker] 工作进程已就绪")
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            break
+        if job is None:
+            break
+
+        try:
+            CONFIG.reload()
+            if job.get("type") == "metrics":
+                result = engine.run_metrics()
+            else:
+                result = engine.run(force=job.get("force", False))
+            reply = {"id": job["id"], "ok": True, "result": result}
+        except Exception as e:
+            error = classify_error(e)
+            reply = {
+                "id": job["id"],
+                "ok": False,
+                "code": error.code,
+                "error": error.message,
+                "error_type": type(e).__name__,
+                "traceback": traceback.format_exc(),
+            }
+
+        try:
+            conn.send(reply)
+        except (EOFError, OSError):
+            break
+
+
+class RefreshWorker:
+    def __init__(self, timeout: float = JOB_TIMEOUT):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._ctx = multiprocessing.get_context("spawn")
+        self._proc = None
+        self._conn = None
+        self._next_id = 0
+
+    def _start(self):
+        parent_conn, child_conn = self._ctx.Pipe()
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn,),
+            daemon=True,
+            name="RefreshWorker",
+        )
+        proc.start()
+        child_conn.close()
+        self._proc = proc
+        self._conn = parent_conn
+        print(f"[RefreshWorker] 工作进程已启动 (pid={proc.pid})")
+
+    def _kill(self):
+        proc, conn = self._proc, self._conn
+        self._proc = None
+        self._conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        if proc is not None and proc.is_alive():
+            proc.terminate()
+            proc.join(2)
+            if proc.is_alive():
+                proc.kill()
+                proc.join(2)
+
+    def ensure_started(self):
+        """确保工作进程存活（启动时预热 / 崩溃后重启）"""
+        with self._lock:
+            self._ensure_started_locked()
+
+    def _ensure_started_locked(self):
+        if self._proc is None or not self._proc.is_alive():
+            self._kill()
+            self._start()
+
+    def run_job(self, force: bool = False, job_type: str = "refresh") -> dict | None:
+        """
+        发送一次任务并等待结果；失败抛 RefreshError
+        job_type: "refresh" 完整刷新 / "metrics" 系统指标快速刷新（工作进程忙时直接跳过，返回 None）
+        """
+        if not self._lock.acquire(blocking=job_type != "metrics"):
+            return None
+        try:
+            self._ensure_started_locked()
+            start = time.time()
+            self._next_id += 1
+            job_id = self._next_id
+
+            try:
+                self._conn.send({"id": job_id, "type": job_type, "force": force})
+                if not self._conn.poll(self.timeout):
+                    self._kill()
+                    self._start()
+                    raise RefreshError(WORKER, f"刷新工作进程 {self.timeout} 秒无响应，已重启")
+                reply = self._conn.recv()
+            except (EOFError, OSError) as e:
+                self._kill()
+                self._start()
+                raise RefreshError(WORKER, f"刷新工作进程异常退出，已重启: {e}")
+        finally:
+            self._lock.release()
+
+        if not reply["ok"]:
+            raise RefreshError.from_dict(reply, f"[{reply['error_type']}]\n{reply['traceback']}")
+
+        result = reply["result"]
+        if result is None:
+            return None
+        result["mode"] = "worker"
+        result["roundtrip"] = round(time.time() - start, 2)
+        return result
+
+    def stop(self):
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.send(None)
+                    self._proc.join(2)
+                except Exception:
+                    pass
+            self._kill()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_worker() -> RefreshWorker:
+    """托盘进程内共享的工作进程句柄"""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = RefreshWorker()
+        return _worker
@@ -0,0 +1,123 @@
+# app/render.py
+"""
+墨水屏画面渲染（128x296）
+
+布局由 layout/<name>.json 描述、编译成绘制操作（见 app/layout.py），这里只负责：
+- 把天气数据 / 系统指标整理成布局绑定的值（数字格式、温度取整等与原脚本一致）
+- 分图层执行：静态底图（按日期、核心数、布局版本缓存）→ 天气 → 系统指标
+
+默认直接渲染 1 bit 画面（display.render_mode = "1"），打包成帧缓冲时不用再转换。
+"""
+import datetime
+from functools import lru_cache
+
+from PIL import Image
+
+from app.layout import get_layout
+
+
+def _weekday(date_str: str) -> str:
+    year, month, day = map(int, date_str.split('-'))
+    return datetime.date(year, month, day).strftime("%A")
+
+
+def _temp_str(value: str) -> str:
+    """温度值转成带符号的整数字符串"""
+    digits = [d for d in value if d.isdigit() or d == "-"]
+    return "{:d}".format(int("".join(digits)))
+
+
+def _bind_weather(weather: dict) -> dict:
+    """天气数据 → 布局绑定值"""
+    today = weather['daily'][0]
+    return {
+        "date": today['fxDate'],
+        "weekday": _weekday(today['fxDate']),
+        "icon_day": today['iconDay'],
+        "icon_night": today['iconNight'],
+        "text_day": today['textDay'],
+        "text_night": today['textNight'],
+        "temp_min": _temp_str(today['tempMin']),
+        "temp_max": _temp_str(today['tempMax']),
+        "temp_now": _temp_str(weather['now']['temp']),
+        "city": weather['name'],
+        "minutely": weather['minutely'],
+    }
+
+
+def _bind_metrics(metrics: dict, layout) -> dict:
+    """系统指标 → 布局绑定值"""
+    # CPU 占用率：10% 以上取整，以下保留 1 位小数
+    cpu_percent = metrics['cpu_percent']
+    if cpu_percent >= 10:
+        cpu = str(int(cpu_percent))
+    else:
+        cpu = str(cpu_percent)
+
+    # 总内存（GB）：四舍五入到整数，两三位数时去掉 ".0"
+    mem_total = round((float(metrics['mem_total']) / 1024 / 1024 / 1024), 0)
+    mem_total_str = str(mem_total)
+    if len(mem_total_str) in (4, 5):
+        mem_total_str = str(int(mem_total))
+
+    mem_percent = str(int(metrics['mem_percent']))
+    cpu_count = int(metrics['cpu_count'])
+
+    print("CPU使用率：", cpu, "CPU核心数量：", cpu_count)
+    print("内存总量: ", mem_total, "内存使用率：", mem_percent, "%")
+
+    return {
+        "cpu_percent": cpu,
+        "mem_total": mem_total_str,
+        "mem_percent": mem_percent,
+        "per_cpu": metrics['per_cpu'],
+        **layout.cpu_layout(cpu_count),
+    }
+
+
+@lru_cache(maxsize=8)
+def _base_layer(layout, version: int, date_str: str, cpu_count: int) -> Image.Image:
+    ctx = {"date": date_str, "weekday": _weekday(date_str), **layout.cpu_layout(cpu_count)}
+    new_image = layout.new_image()
+    layout.draw(new_image, "base", ctx)
+    return new_image
+
+
+def get_base_layer(date_str: str, cpu_count: int, layout=None) -> Image.Image:
+    """
+    静态底图（日期、星期、CPU 核心框、图标、分隔线），一天只变一次
+    按 (布局, 布局版本, 日期, 核心数) 缓存；返回共享对象，不要直接在上面画，先 copy
+    """
+    layout = layout or get_layout()
+    return _base_layer(layout, layout.version, date_str, int(cpu_count))
+
+
+def render_frame(weather: dict, metrics: dict, layout=None) -> Image.Image:
+    """
+    根据天气数据和系统指标绘制一帧画面
+    weather: app.weather_api.fetch_weather_data 的返回值
+    metrics: app.metrics.collect_metrics 的返回值
+    """
+    layout = layout or get_layout()
+    weather_ctx = _bind_weather(weather)
+
+    # 从缓存的静态底图开始，只绘制随数据变化的部分
+    new_image = get_base_layer(weather_ctx["date"], metrics['cpu_count'], layout).copy()
+    layout.draw(new_image, "weather", weather_ctx)
+    layout.draw(new_image, "metrics", _bind_metrics(metrics, layout))
+    return new_image
+
+
+def render_metrics(base: Image.Image, metrics: dict, layout=None) -> Image.Image:
+    """
+    只重画系统指标区：复制上一帧完整画面，清空指标区后重新绘制
+    结果与用同样的天气数据 render_frame 完全一致
+    """
+    layout = layout or get_layout()
+    ctx = _bind_metrics(metrics, layout)
+
+    new_image = base.copy()
+    new_image.paste(layout.background_fill, layout.regions["metrics"])
+    layout.draw(new_image, "base", ctx, region="metrics")
+    layout.draw(new_image, "metrics", ctx)
+    return new_image
@@ -1,37 +1,56 @@
 # app/scheduler.py
 """
 后台刷新调度器（支持配置热重载）
+
+事件驱动：所有定时点放在一个最小堆里，调度线程只睡到最近的那个截止时间，
+有事件（设置窗口关闭 / 配置变更）时提前唤醒，不再每 30 秒醒来读一遍 state.json。
+
+定时点：
+- interval:  按刷新间隔对齐的下一次刷新（夜间顺延到夜间结束）
+- midnight:  0 点强制刷新
+- metrics:   系统指标快速刷新（夜间顺延到夜间结束）
+
+手动刷新直接进刷新队列（见 app/refresh_queue.py），不经过调度器。
+
+休眠唤醒 / 时钟跳变：每次醒来比较墙上时钟和单调时钟各走了多少，
+偏差超过阈值就认为发生了休眠或校时。错过了刷新时间点时只补刷一次，
+然后按当前时间重新对齐刷新间隔，不会连刷一串，也不会再干等一个过期的间隔。
+睡眠时间最长 MAX_SLEEP_SECONDS，休眠唤醒后最晚这么久就能发现。
 """
+import heapq
+import itertools
+import threading
 import time
 import datetime
 
+from app import state_file
 from app.config import CONFIG
-from app.refresh_impl import run_refresh_async
-from app.state_file import (  # ← 全部改成从这里导入
-    get_next_refresh_time,
-    update_next_refresh_time,
-    get_config_changed,
-    set_config_changed,
-)
+from app.refresh_impl import run_metrics_refresh, run_refresh_async
+
+# 最长睡眠时间（秒）：休眠唤醒后最晚这么久就能发现
+MAX_SLEEP_SECONDS = 60
+
+# 墙上时钟与单调时钟的偏差超过这么多秒视为休眠 / 时钟跳变（NTP 的小幅校时不算）
+JUMP_TOLERANCE_SECONDS = 5
 
 
-def _is_night(now: datetime.datetime) -> bool:
-    if not CONFIG.skip_night:
+def _is_night(now: datetime.datetime, config=CONFIG) -> bool:
+    if not config.skip_night:
         return False
 
-    if CONFIG.night_start < CONFIG.night_end:
-        return CONFIG.night_start <= now.hour < CONFIG.night_end
+    if config.night_start < config.night_end:
+        return config.night_start <= now.hour < config.night_end
     else:
-        return now.hour >= CONFIG.night_start or now.hour < CONFIG.night_end
+        return now.hour >= config.night_start or now.hour < config.night_end
 
 
-def _calc_next_time(now: datetime.datetime) -> datetime.datetime:
+def _calc_next_time(now: datetime.datetime, config=CONFIG) -> datetime.datetime:
     """
     计算下一次刷新时间：从每个整点开始
     例如当前 13:27，间隔 60 分钟 → 下次 14:00
     当前 13:27，间隔 30 分钟 → 下次 14:00（而不是 13:57）
     """
-    interval_minutes = CONFIG.refresh_interval_minutes
+    interval_minutes = config.refresh_interval_minutes
     
     # 先取当前时间的整点
     current_hour_start = now.replace(minute=0, second=0, microsecond=0)
@@ -50,56 +69,250 @@ def _calc_next_time(now: datetime.datetime) -> datetime.datetime:
     return next_time
 
 
+def _night_end(now: datetime.datetime, config=CONFIG) -> datetime.datetime:
+    """夜间窗口结束的时间（now 之后第一个 night_end 整点）"""
+    end = now.replace(hour=config.night_end, minute=0, second=0, microsecond=0)
+    if end <= now:
+        end += datetime.timedelta(days=1)
+    return end
+
+
+def _next_midnight(now: datetime.datetime) -> datetime.datetime:
+    return datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time())
+
+
+class Scheduler:
+    def __init__(self, monotonic=time.monotonic, now=datetime.datetime.now,
+                 refresh=None, metrics=None, config=None, state=None):
+        """
+        monotonic / now: 单调时钟与墙上时钟（测试里换成模拟时钟）
+        refresh / metrics: 提交完整刷新 / 指标刷新，默认交给刷新队列
+        config: 调度配置，默认全局 CONFIG
+        state: 提供 update_next_refresh_time / get_config_changed / set_config_changed 的对象，
+               默认 app.state_file
+        """
+        self._mono = monotonic
+        self._now = now
+        self._refresh = refresh or run_refresh_async
+        self._metrics = metrics or run_metrics_refresh
+        self._config = config or CONFIG
+        self._state = state or state_file
+
+        self._cond = threading.Condition()
+        # 定时点堆: (单调时钟截止时间, 序号, 类型, 墙上目标时间)，只在调度线程里增删
+        self._heap = []
+        self._seq = itertools.count()
+        self._events = set()
+        self.next_refresh_time = None
+
+        # 上一次醒来时的两个时钟读数，用来发现休眠 / 时钟跳变
+        self._last_wall = None
+        self._last_mono = None
+
+    # ================== 事件 ==================
+    def wake(self, event: str):
+        """提前唤醒调度线程处理事件（如 "settings_closed"、"config_changed"）"""
+        with self._cond:
+            self._events.add(event)
+            self._cond.notify()
+
+    # ================== 定时点 ==================
+    def _schedule_at(self, kind: str, when: datetime.datetime, now: datetime.datetime):
+        """按墙上时间安排定时点，堆里存换算后的单调时钟时间"""
+        deadline = self._mono() + max((when - now).total_seconds(), 0)
+        heapq.heappush(self._heap, (deadline, next(self._seq), kind, when))
+
+    def _schedule_after(self, kind: str, seconds: float, now: datetime.datetime):
+        when = now + datetime.timedelta(seconds=seconds)
+        heapq.heappush(self._heap, (self._mono() + seconds, next(self._seq), kind, when))
+
+    def _set_next_refresh_time(self, next_time: datetime.datetime):
+        """下次刷新时间只在变化时写状态文件（托盘 tooltip / 设置窗口显示用）"""
+        if next_time != self.next_refresh_time:
+            self.next_refresh_time = next_time
+            self._state.update_next_refresh_time(next_time)
+
+    def _schedule_interval(self, now: datetime.datetime):
+        next_time = _calc_next_time(now, self._config)
+        if _is_night(next_time, self._config):
+            # 夜间不刷新：顺延到夜间结束时刷新一次
+            next_time = max(next_time, _night_end(next_time, self._config))
+        self._set_next_refresh_time(next_time)
+        self._schedule_at("interval", next_time, now)
+
+    def _schedule_midnight(self, now: datetime.datetime):
+        if self._config.force_refresh_at_midnight:
+            self._schedule_at("midnight", _next_midnight(now), now)
+
+    def _schedule_metrics(self, now: datetime.datetime):
+        interval = self._config.metrics_interval_seconds
+        if interval <= 0:
+            return
+        if _is_night(now, self._config):
+            self._schedule_at("metrics", _night_end(now, self._config), now)
+        else:
+            self._schedule_after("metrics", interval, now)
+
+    def _reschedule_all(self, now: datetime.datetime):
+        """配置变化 / 时钟跳变后，按当前墙上时间重建全部定时点（重新对齐刷新间隔）"""
+        self._heap.clear()
+        self._schedule_interval(now)
+        self._schedule_midnight(now)
+        self._schedule_metrics(now)
+
+    # ================== 处理 ==================
+    def _on_interval(self, now: datetime.datetime):
+        if not _is_night(now, self._config):
+            print(f"[Scheduler] 执行刷新: {now}")
+            self._refresh(source="scheduled")
+        self._schedule_interval(now)
+        print(f"[Scheduler] 更新下次时间: {self.next_refresh_time}")
+
+    def _on_midnight(self, now: datetime.datetime):
+        if self._config.force_refresh_at_midnight:
+            print("[Scheduler] 执行 0 点强制刷新")
+            self._refresh(source="midnight")
+        self._schedule_midnight(now)
+
+    def _on_metrics(self, now: datetime.datetime):
+        if not _is_night(now, self._config):
+            self._metrics()
+        self._schedule_metrics(now)
+
+    def _check_config(self, now: datetime.datetime):
+        if not self._state.get_config_changed():
+            return
+        print("[Scheduler] 配置变更，重新加载并重新计算")
+        self._config.reload()
+        self._state.set_config_changed(False)
+
+        if self._config.refresh_immediately_on_config_change and not _is_night(now, self._config):
+            print("[Scheduler] 配置变更后立即刷新一次")
+            self._refresh(source="config")
+        self._reschedule_all(now)
+
+    # ================== 休眠 / 时钟跳变 ==================
+    def _clock_drift(self, now: datetime.datetime, mono: float) -> float:
+        """
+        两次醒来之间墙上时钟比单调时钟多走的秒数
+        休眠期间单调时钟停走、墙上时钟照走 → 正值；NTP 回拨 / 手动改时间 → 负值
+        """
+        if self._last_wall is None:
+            return 0.0
+        return (now - self._last_wall).total_seconds() - (mono - self._last_mono)
+
+    def _on_clock_jump(self, now: datetime.datetime, drift: float, previous: datetime.datetime):
+        """
+        休眠唤醒 / 时钟跳变：错过了刷新时间点的话只补刷一次，然后按当前时间重新对齐
+        堆里的截止时间是按旧的墙上时间换算的，整个重建
+        """
+        if drift > 0:
+            print(f"[Scheduler] 检测到休眠唤醒或时钟前跳 {round(drift)}s")
+        else:
+            print(f"[Scheduler] 检测到时钟回拨 {round(-drift)}s")
+
+        missed = drift > 0 and (
+            (self.next_refresh_time is not None and now >= self.next_refresh_time)
+            or (self._config.force_refresh_at_midnight and now.date() > previous.date())
+        )
+        if missed and not _is_night(now, self._config):
+            print("[Scheduler] 错过了刷新时间，补刷一次")
+            self._refresh(source="resume")
+        self._reschedule_all(now)
+        print(f"[Scheduler] 重新对齐，下次刷新: {self.next_refresh_time}")
+
+    # ================== 主循环 ==================
+    def _pop_due(self, mono: float) -> list:
+        """取出所有到期的定时点 [(类型, 墙上目标时间), ...]"""
+        due = []
+        while self._heap and self._heap[0][0] <= mono:
+            _, _, kind, when = heapq.heappop(self._heap)
+            due.append((kind, when))
+        return due
+
+    def _wait(self) -> bool:
+        """
+        睡到最近的定时点、有事件、或最多 MAX_SLEEP_SECONDS，返回是否有事件
+        睡眠上限用来及时发现休眠唤醒（休眠期间单调时钟停走，截止时间会整体推迟）
+        """
+        with self._cond:
+            if not self._events:
+                timeout = MAX_SLEEP_SECONDS
+                if self._heap:
+                    timeout = min(timeout, self._heap[0][0] - self._mono())
+                if timeout > 0:
+                    self._cond.wait(timeout)
+            had_events = bool(self._events)
+            self._events.clear()
+        return had_events
+
+    def _tick(self, had_events: bool = False):
+        """处理一次醒来：先检查时钟跳变，再处理配置变更和到期的定时点"""
+        now = self._now()
+        mono = self._mono()
+        drift = self._clock_drift(now, mono)
+        previous = self._last_wall
+        self._last_wall, self._last_mono = now, mono
+
+        due = self._pop_due(mono)
+        if abs(drift) > JUMP_TOLERANCE_SECONDS:
+            self._on_clock_jump(now, drift, previous)
+            due = []
+
+        # 只在有事件或到了定时点时读一次状态文件，
+        # 后者兜底处理不是由本托盘拉起的设置窗口改的配置
+        if had_events or due:
+            self._check_config(now)
+
+        handlers = {"interval": self._on_interval, "midnight": self._on_midnight, "metrics": self._on_metrics}
+        for kind, when in due:
+            # 以目标时间和当前时间较晚者为准，避免提前零点几毫秒醒来时又排到同一个时间点
+            handlers[kind](max(now, when))
+
+    def start(self):
+        """启动即刷新一次，并安排全部定时点"""
+        now = self._now()
+        self._last_wall, self._last_mono = now, self._mono()
+
+        # 启动时先主动刷新一次（用户要求：每次打开 app 刷新）
+        print("[Scheduler] 启动即刷新一次")
+        self._refresh(source="startup")
+
+        # 托盘没运行时改过的配置，启动时一并处理
+        if self._state.get_config_changed():
+            self._config.reload()
+            self._state.set_config_changed(False)
+
+        self._reschedule_all(now)
+        print(f"[Scheduler] 启动初始化: {self.next_refresh_time}")
+
+    def run(self):
+        self.start()
+        while True:
+            self._tick(self._wait())
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> Scheduler:
+    """托盘进程内唯一的调度器"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = Scheduler()
+        return _scheduler
+
+
+def notify_scheduler(event: str):
+    """唤醒调度线程处理事件（设置窗口关闭、配置变更等）"""
+    get_scheduler().wake(event)
+
+
 def start_scheduler():
     """
     后台调度线程（常驻）
     支持配置热重载
     """
-    last_force_refresh_date = None
-
-    # 启动时先主动刷新一次（用户要求：每次打开 app 刷新）
-    now = datetime.datetime.now()
-    print("[Scheduler] 启动即刷新一次")
-    run_refresh_async()
-
-    # 然后计算并记录下一次刷新时间
-    next_time = _calc_next_time(now)
-    update_next_refresh_time(next_time)
-    print(f"[Scheduler] 启动初始化: {next_time}")
-
-    while True:
-        now = datetime.datetime.now()
-
-        # 检查配置变更
-        if get_config_changed():
-            print("[Scheduler] 配置变更，重新加载并重新计算")
-            CONFIG.reload()
-            set_config_changed(False)
-
-            if CONFIG.refresh_immediately_on_config_change and not _is_night(now):
-                print("[Scheduler] 配置变更后立即刷新一次")
-                run_refresh_async()
-                
-            next_time = _calc_next_time(now)
-            update_next_refresh_time(next_time)
-
-        # 0 点强制刷新（每天一次）
-        if CONFIG.force_refresh_at_midnight:
-            if now.hour == 0:
-                today = now.date()
-                if last_force_refresh_date != today:
-                    print("[Scheduler] 执行 0 点强制刷新")
-                    run_refresh_async()
-                    last_force_refresh_date = today
-
-        # 正常刷新逻辑
-        if not _is_night(now):
-            next_time = get_next_refresh_time()
-            if next_time is None or now >= next_time:
-                print(f"[Scheduler] 执行刷新: {now}")
-                run_refresh_async()
-                next_time = _calc_next_time(now)
-                update_next_refresh_time(next_time)
-                print(f"[Scheduler] 更新下次时间: {next_time}")
-
-        time.sleep(30)
\ No newline at end of file
+    get_scheduler().run()
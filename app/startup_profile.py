@@ -0,0 +1,126 @@
+# app/startup_profile.py
+"""
+各启动模式的 import 耗时分析（main.py --startup-profile）
+
+对每个模式（tray / gui / refresh）单独起一个 python -X importtime 子进程，
+只导入该模式启动时会导入的模块，汇总成：
+- 子进程总耗时（含解释器启动）
+- 顶层 import 按累计耗时排序
+- 重量级依赖（tkinter / PIL / requests / hid / psutil / pystray）是否被加载
+
+    python main.py --startup-profile            # 全部模式
+    python main.py --startup-profile --gui      # 只看设置窗口
+"""
+import ast
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# 各模式启动时导入的模块；refresh 模式直接读旧脚本的顶层 import，保持同步
+MODE_IMPORTS = {
+    "tray": ["app.tray", "app.scheduler"],
+    "gui": ["app.gui_process"],
+    "refresh": None,
+}
+
+HEAVY_MODULES = ("tkinter", "PIL", "requests", "hid", "psutil", "pystray")
+
+TOP_N = 12
+
+
+def _script_imports(path: Path) -> list:
+    """脚本顶层 import 的模块名"""
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def mode_imports(mode: str) -> list:
+    modules = MODE_IMPORTS[mode]
+    if modules is None:
+        modules = _script_imports(PROJECT_ROOT / "legacy" / "update_weather.py")
+    return modules
+
+
+def parse_importtime(stderr: str) -> list:
+    """
+    解析 -X importtime 输出，返回 [(模块名, 层级, 自身 us, 累计 us), ...]
+    层级 0 为顶层 import
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+            rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    return rows
+
+
+def profile_mode(mode: str) -> dict:
+    """在干净的子进程里导入一个模式的模块，返回耗时分析"""
+    modules = mode_imports(mode)
+    code = "; ".join(f"import {name}" for name in modules)
+
+    env = os.environ.copy()
+    env["PYTHONPATH"] = str(PROJECT_ROOT) + os.pathsep + env.get("PYTHONPATH", "")
+
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=str(PROJECT_ROOT),
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    wall = time.perf_counter() - start
+
+    rows = parse_importtime(result.stderr)
+    loaded = {name for name, _, _, _ in rows}
+    errors = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+    return {
+        "mode": mode,
+        "ok": result.returncode == 0,
+        "wall": wall,
+        "imports_us": sum(cumulative for _, depth, _, cumulative in rows if depth == 0),
+        "top": sorted((r for r in rows if r[1] == 0), key=lambda r: r[3], reverse=True)[:TOP_N],
+        "heavy": [m for m in HEAVY_MODULES if m in loaded],
+        "error": errors[-1] if errors and result.returncode != 0 else "",
+    }
+
+
+def print_report(report: dict):
+    print(f"\n[StartupProfile] 模式 {report['mode']}")
+    if not report["ok"]:
+        print(f"  导入失败: {report['error']}")
+    print(f"  子进程总耗时 {report['wall'] * 1000:.0f} ms，import 合计 {report['imports_us'] / 1000:.1f} ms")
+    print(f"  重量级依赖: {', '.join(report['heavy']) or '无'}")
+    print(f"  {'累计 ms':>8} {'自身 ms':>8}  模块")
+    for name, _, self_us, cumulative_us in report["top"]:
+        print(f"  {cumulative_us / 1000:8.1f} {self_us / 1000:8.1f}  {name}")
+
+
+def run(argv: list = None):
+    """main.py --startup-profile 入口"""
+    argv = sys.argv if argv is None else argv
+
+    if getattr(sys, "frozen", False):
+        print("[StartupProfile] 打包后的程序不支持 -X importtime，请在源码环境运行")
+        return
+
+    selected = [mode for mode in MODE_IMPORTS if f"--{mode}" in argv] or list(MODE_IMPORTS)
+    for mode in selected:
+        print_report(profile_mode(mode))
@@ -1,8 +1,15 @@
 # app/state_file.py
 """
 使用 JSON 文件共享运行状态（解决多进程问题）
+
+托盘、设置窗口、刷新子进程都会改状态文件：
+- 读 → 改 → 写整个过程持有锁（进程内 RLock + state.lock 文件锁），不会互相覆盖对方的字段
+- 每次写入用唯一的临时文件再原子替换，并发写入不会共用同一个 .tmp
 """
+import contextlib
 import json
+import tempfile
+import threading
 from pathlib import Path
 import datetime
 import time
@@ -12,6 +19,68 @@ STATE_DIR = Path.home() / ".update-weather"
 STATE_DIR.mkdir(exist_ok=True)
 
 STATE_FILE = STATE_DIR / "state.json"
+LOCK_FILE = STATE_DIR / "state.lock"
+
+_thread_lock = threading.RLock()
+_lock_depth = 0
+
+LOCK_TIMEOUT = 10
+
+
+def _lock_file(f):
+    if os.name == "nt":
+        import msvcrt
+
+        # LK_LOCK 自己会重试 10 次（约 10 秒），超时抛 OSError
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+    else:
+        import fcntl
+
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while True:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                if time.monotonic() > deadline:
+                    raise TimeoutError("等待状态文件锁超时")
+                time.sleep(0.01)
+
+
+def _unlock_file(f):
+    if os.name == "nt":
+        import msvcrt
+
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+@contextlib.contextmanager
+def state_lock():
+    """跨线程、跨进程的状态文件锁（同一线程内可重入）"""
+    global _lock_depth
+    with _thread_lock:
+        if _lock_depth:
+            _lock_depth += 1
+            try:
+                yield
+            finally:
+                _lock_depth -= 1
+            return
+
+        with open(LOCK_FILE, "a+b") as f:
+            _lock_file(f)
+            _lock_depth = 1
+            try:
+                yield
+            finally:
+                _lock_depth = 0
+                _unlock_file(f)
 
 
 def load_state():
@@ -50,31 +119,44 @@ def save_state(data):
     if serializable.get("last_refresh_time"):
         serializable["last_refresh_time"] = serializable["last_refresh_time"].isoformat()
 
-    tmp_file = STATE_FILE.with_suffix(".json.tmp")
+    tmp_file = None
     try:
-        with open(tmp_file, "w", encoding="utf-8") as f:
-            json.dump(serializable, f, indent=2)
-            f.flush()
-            os.fsync(f.fileno())
-
-        # 原子替换：要么旧文件，要么新文件，不会出现半文件
-        tmp_file.replace(STATE_FILE)
+        with state_lock():
+            with tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=STATE_DIR, prefix="state.", suffix=".json.tmp", delete=False
+            ) as f:
+                tmp_file = Path(f.name)
+                json.dump(serializable, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+
+            # 原子替换：要么旧文件，要么新文件，不会出现半文件
+            tmp_file.replace(STATE_FILE)
 
         print(f"[StateFile] 状态已保存: next_refresh_time={data.get('next_refresh_time')}")
     except Exception as e:
         print(f"[StateFile] 保存状态失败: {e}")
         try:
-            if tmp_file.exists():
+            if tmp_file is not None and tmp_file.exists():
                 tmp_file.unlink()
         except Exception:
             pass
 
 
+def update_state(**changes):
+    """在锁内读 → 改 → 写，只改给定的字段"""
+    try:
+        with state_lock():
+            data = load_state()
+            data.update(changes)
+            save_state(data)
+    except Exception as e:
+        print(f"[StateFile] 更新状态失败: {e}")
+
+
 def update_next_refresh_time(new_time: datetime.datetime | None):
     """更新下次刷新时间"""
-    data = load_state()
-    data["next_refresh_time"] = new_time
-    save_state(data)
+    update_state(next_refresh_time=new_time)
 
 
 def get_next_refresh_time() -> datetime.datetime | None:
@@ -84,9 +166,7 @@ def get_next_refresh_time() -> datetime.datetime | None:
 
 # 加在 state_file.py 最后
 def set_config_changed(value: bool):
-    data = load_state()
-    data["config_changed"] = value
-    save_state(data)
+    update_state(config_changed=value)
 
 
 def get_config_changed():
@@ -94,11 +174,19 @@ def get_config_changed():
     return data.get("config_changed", False)
 
 def update_last_refresh_time(time_obj):
-    data = load_state()
-    data["last_refresh_time"] = time_obj
-    save_state(data)
+    update_state(last_refresh_time=time_obj)
 
 
 def get_last_refresh_time():
     data = load_state()
-    return data.get("last_refresh_time")
\ No newline at end of file
+    return data.get("last_refresh_time")
+
+
+def update_last_frame_hash(value: str | None):
+    """记录最近一次成功发到墨水屏的帧指纹"""
+    update_state(last_frame_hash=value)
+
+
+def get_last_frame_hash() -> str | None:
+    data = load_state()
+    return data.get("last_frame_hash")
\ No newline at end of file
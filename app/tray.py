@@ -3,8 +3,8 @@ import pystray
 import threading
 import time
 from app.icon import create_tray_image
-from app.refresh_impl import run_refresh_async
-from app.gui_process import launch_gui_process
+from app.refresh_impl import get_last_result, run_refresh_async
+from app.gui_launcher import launch_gui_process
 from app.autostart import toggle_autostart, is_autostart_enabled
 from app.state_file import get_next_refresh_time, get_last_refresh_time
 
@@ -34,6 +34,11 @@ def _build_tooltip_text() -> str:
     else:
         last_line = f"上次刷新：{last_time.strftime('%Y-%m-%d %H:%M')}"
 
+    result = get_last_result()
+    if result is not None and not result["ok"]:
+        reason = result["error"].splitlines()[0] if result["error"] else result["code"]
+        last_line += f"\n刷新失败：{reason}"
+
     return f"UpdateWeather\n{next_line}\n{last_line}"
 
 
@@ -59,8 +64,13 @@ def debounced_refresh():
         return  # 忽略重复点击
     
     _last_refresh_click = now
-    # 在后台线程执行，不要阻塞 UI
-    threading.Thread(target=run_refresh_async, daemon=True).start()
+    # 在后台线程执行，不要阻塞 UI；手动刷新总是重新发送画面
+    threading.Thread(target=run_refresh_async, kwargs={"force": True, "source": "manual"}, daemon=True).start()
+
+
+def _on_settings_closed():
+    from app.scheduler import notify_scheduler
+    notify_scheduler("settings_closed")
 
 
 def debounced_settings():
@@ -73,7 +83,8 @@ def debounced_settings():
     
     _last_settings_click = now
     # 在后台线程执行，不要阻塞 UI
-    threading.Thread(target=launch_gui_process, daemon=True).start()
+    # 设置窗口关闭后立即唤醒调度器检查配置变更
+    threading.Thread(target=launch_gui_process, kwargs={"on_exit": _on_settings_closed}, daemon=True).start()
 
 
 def start_tray():
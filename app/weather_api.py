@@ -0,0 +1,195 @@
+# app/weather_api.py
+"""
+和风天气接口访问
+
+3 天预报 / 实时天气 / 城市查询三个请求互不依赖，并发发出；
+分钟级降水需要经纬度，城市查询一返回就立即发出。
+整体耗时约等于最慢的那一条请求链，而不是所有请求之和。
+
+城市名 / 经纬度对同一个 location 永远不变，缓存在 ~/.update-weather/geo_cache.json，
+热刷新时直接跳过城市查询接口。
+"""
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+URL_3D = 'https://devapi.qweather.com/v7/weather/3d'
+URL_NOW = 'https://devapi.qweather.com/v7/weather/now'
+URL_MINUTELY = 'https://devapi.qweather.com/v7/minutely/5m'
+URL_GEO = 'https://geoapi.qweather.com/v2/city/lookup'
+
+# 单个请求超时（秒），避免弱网下卡死整个刷新
+REQUEST_TIMEOUT = 10
+
+CACHE_DIR = Path.home() / ".update-weather"
+GEO_CACHE_FILE = CACHE_DIR / "geo_cache.json"
+
+
+# ================== 城市查询缓存 ==================
+def load_geo_cache(location: str) -> dict | None:
+    """
+    读取 location 对应的城市缓存，返回 {"name", "lat", "lon"}
+    缓存属于别的 location（配置已修改）或文件损坏时返回 None
+    """
+    if not GEO_CACHE_FILE.exists():
+        return None
+
+    try:
+        with open(GEO_CACHE_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("location") != location:
+            return None
+        return {
+            "name": data["name"],
+            "lat": float(data["lat"]),
+            "lon": float(data["lon"]),
+        }
+    except Exception as e:
+        print(f"[WeatherAPI] 读取城市缓存失败: {e}")
+        return None
+
+
+def save_geo_cache(location: str, name: str, lat: float, lon: float):
+    """
+    保存城市缓存（原子写入）
+    文件里只保留当前 location 一条，location 变化后旧缓存自然失效
+    """
+    CACHE_DIR.mkdir(exist_ok=True)
+    tmp_file = GEO_CACHE_FILE.with_suffix(".json.tmp")
+    try:
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"location": location, "name": name, "lat": lat, "lon": lon},
+                      f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        tmp_file.replace(GEO_CACHE_FILE)
+    except Exception as e:
+        print(f"[WeatherAPI] 保存城市缓存失败: {e}")
+        try:
+            if tmp_file.exists():
+                tmp_file.unlink()
+        except Exception:
+            pass
+
+
+def clear_geo_cache():
+    """删除城市缓存（location 修改后调用）"""
+    try:
+        GEO_CACHE_FILE.unlink(missing_ok=True)
+    except Exception as e:
+        print(f"[WeatherAPI] 删除城市缓存失败: {e}")
+
+
+def _get_json(session, url: str, params: dict, field: str, timeout: float, cache=None, name: str = ""):
+    """
+    GET 一个接口并取出指定字段（传入 cache 时先走响应缓存）
+    返回 (字段值, 耗时秒数, 来源)
+    """
+    start = time.perf_counter()
+    if cache is not None:
+        payload, source = cache.get_json(session, name, url, params, timeout)
+    else:
+        with session.get(url, params=params, timeout=timeout) as r:
+            r.raise_for_status()
+            payload = r.json()
+        source = "network"
+    latency = round(time.perf_counter() - start, 3)
+
+    try:
+        return payload[field], latency, source
+    except KeyError:
+        # 和风天气出错时返回 {"code": "401"} 之类，没有业务字段
+        raise ValueError(str(payload))
+
+
+def fetch_weather_data(session, key: str, location: str, timeout: float = REQUEST_TIMEOUT, cache=None) -> dict:
+    """
+    并发拉取全部天气数据
+    cache: app.http_cache.ResponseCache，None 表示每次都走网络
+
+    返回 dict：
+    - daily / now / minutely: 接口原始业务字段
+    - name / lat / lon: 城市名与经纬度
+    - geo_cached: 城市信息是否来自本地缓存
+    - latency: 每个接口的耗时（秒），命中城市缓存时没有 geo
+    - sources: 每个接口数据的来源（network / cache / revalidated / stale）
+    - duration: 整个拉取阶段的墙钟耗时（秒）
+
+    网络错误抛 requests.RequestException，key / location 错误抛 KeyError / ValueError
+    """
+    start = time.perf_counter()
+
+    params = {
+        'key': key,
+        'location': location,
+        'language': 'zh',
+        'unit': 'm'
+    }
+    params_geo = {
+        'key': key,
+        'location': location
+    }
+
+    latency = {}
+    sources = {}
+    geo_cached = load_geo_cache(location)
+
+    with ThreadPoolExecutor(max_workers=4, thread_name_prefix="WeatherFetch") as pool:
+        f_3d = pool.submit(_get_json, session, URL_3D, params, 'daily', timeout, cache, '3d')
+        f_now = pool.submit(_get_json, session, URL_NOW, params, 'now', timeout, cache, 'now')
+
+        if geo_cached:
+            name = geo_cached['name']
+            lat = geo_cached['lat']
+            lon = geo_cached['lon']
+            sources['geo'] = 'cache'
+        else:
+            f_geo = pool.submit(_get_json, session, URL_GEO, params_geo, 'location', timeout)
+
+            # 拿到经纬度后立刻发分钟级降水请求，不等 3d / now
+            geo, latency['geo'], sources['geo'] = f_geo.result()
+            name = geo[0]['name']
+            lat = round(float(geo[0]['lat']), 2)
+            lon = round(float(geo[0]['lon']), 2)
+
+        params_minutely = {
+            'key': key,
+            'location': str(lon) + "," + str(lat),
+            'language': 'zh',
+            'unit': 'm'
+        }
+        f_minutely = pool.submit(_get_json, session, URL_MINUTELY, params_minutely, 'summary', timeout,
+                                 cache, 'minutely')
+
+        daily, latency['3d'], sources['3d'] = f_3d.result()
+        now, latency['now'], sources['now'] = f_now.result()
+        minutely, latency['minutely'], sources['minutely'] = f_minutely.result()
+
+    # 全部接口成功后才写缓存，避免把错误的 location 解析结果存下来
+    if not geo_cached:
+        save_geo_cache(location, name, lat, lon)
+
+    return {
+        "daily": daily,
+        "now": now,
+        "minutely": minutely,
+        "name": name,
+        "lat": lat,
+        "lon": lon,
+        "geo_cached": bool(geo_cached),
+        "latency": latency,
+        "sources": sources,
+        "duration": round(time.perf_counter() - start, 3),
+    }
+
+
+def print_weather_summary(weather: dict):
+    """打印本次拉取结果（刷新日志用）"""
+    print('获取当前天气' + weather['daily'][0]['fxDate'])
+    print('城市名: ' + weather['name'] + ('（缓存）' if weather['geo_cached'] else ''))
+    print('经纬度: ' + str(weather['lat']) + "-" + str(weather['lon']))
+    print('分钟预报: ' + weather['minutely'])
+    print('接口耗时: ' + ", ".join(f"{k}={v}s({weather['sources'][k]})" for k, v in weather['latency'].items())
+          + f" | 总计 {weather['duration']}s")
@@ -0,0 +1,48 @@
+# bench/framebuffer.py
+"""
+帧缓冲打包基准：原先逐像素拼 '0b...' 字符串再 int(i, 2) 的实现 vs 现在的 pack_frame
+（在项目根目录运行）：
+
+    python -m bench.framebuffer
+
+原实现只留在这里作基准，不放回 app/；两者输出一致由 tests/test_framebuffer.py 的金样保证。
+"""
+import timeit
+
+from PIL import Image
+
+from app.framebuffer import DEFAULT_THRESHOLD, FRAME_BYTES, FRAME_HEIGHT, FRAME_WIDTH, pack_frame
+
+
+def pack_frame_string(img: Image.Image, threshold: int = DEFAULT_THRESHOLD) -> bytes:
+    """原始的字符串打包实现（原 update_weather.py）"""
+    black_img = img.convert("L")
+    bdata_list = list(black_img.tobytes())
+
+    bvalue_list = [0 if i < threshold else 1 for i in bdata_list]
+    ob_list = []
+    s = "0b"
+    for i in range(1, len(bvalue_list) + 1):
+        s += str(bvalue_list[i - 1])
+        if i % 8 == 0:
+            ob_list.append(s)
+            s = "0b"
+    return bytes(int(i, 2) for i in ob_list)
+
+
+def main(rounds: int = 50):
+    rgb = Image.effect_noise((FRAME_WIDTH, FRAME_HEIGHT), 96).convert("RGB")
+    bitmap = rgb.convert("1")
+    assert pack_frame(rgb) == pack_frame_string(rgb)
+
+    legacy = timeit.timeit(lambda: pack_frame_string(rgb), number=rounds) / rounds
+    fast = timeit.timeit(lambda: pack_frame(rgb), number=rounds) / rounds
+    from_bitmap = timeit.timeit(lambda: pack_frame(bitmap), number=rounds) / rounds
+    print(f"帧大小: {FRAME_BYTES} 字节，输出一致")
+    print(f"字符串打包:         {legacy * 1000:.3f} ms/帧")
+    print(f"PIL 打包（RGB）:    {fast * 1000:.3f} ms/帧  加速 {legacy / fast:.0f}x")
+    print(f"PIL 打包（1 bit）:  {from_bitmap * 1000:.3f} ms/帧  加速 {legacy / from_bitmap:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+# bench/hid_frame.py
+"""
+HID 分包基准（在项目根目录运行）：
+
+    python -m bench.hid_frame
+"""
+import os
+import timeit
+
+from app.framebuffer import FRAME_BYTES
+from app.hid_frame import PacketFramer
+
+
+def main(rounds: int = 2000):
+    framer = PacketFramer()
+    data = os.urandom(FRAME_BYTES)
+    prev = bytearray(data)
+    prev[1000:1160] = bytes(160)
+
+    full = timeit.timeit(lambda: framer.frame(data), number=rounds) / rounds
+    diff = timeit.timeit(lambda: framer.changed_packets(prev, data), number=rounds) / rounds
+    print(f"整帧分包:   {full * 1000:.3f} ms/帧（{framer.count} 包）")
+    print(f"包级差异:   {diff * 1000:.3f} ms/帧（{len(framer.changed_packets(prev, data))} 包变化，仅统计）")
+
+
+if __name__ == "__main__":
+    main()
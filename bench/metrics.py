@@ -0,0 +1,28 @@
+# bench/metrics.py
+"""
+系统指标采集耗时：阻塞采样 vs 后台采样（在项目根目录运行）：
+
+    python -m bench.metrics
+"""
+import time
+
+from app.metrics import WINDOW_SECONDS, collect_metrics, start_sampler
+
+
+def main():
+    start = time.perf_counter()
+    collect_metrics()
+    blocking = time.perf_counter() - start
+
+    start_sampler()
+    time.sleep(WINDOW_SECONDS)
+    start = time.perf_counter()
+    metrics = collect_metrics()
+    sampled = time.perf_counter() - start
+
+    print(f"阻塞采样: {blocking * 1000:.0f} ms")
+    print(f"后台采样: {sampled * 1000:.2f} ms  总 {metrics['cpu_percent']}% 各核心 {metrics['per_cpu']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# bench/render.py
+"""
+系统指标快速刷新的实际开销（在项目根目录运行）：
+
+    python -m bench.render
+
+指标刷新只省掉了联网和完整渲染；推送仍是整帧（77 包 × 64 字节），
+每次还要读一次 state.json 判断画面是否变化、推送后带锁 + fsync 写回帧指纹。
+这里统计重画、打包、去重检查、整帧分包写入和状态文件写回的耗时。
+HID 包写到一个什么都不做的假设备上，USB 传输本身的时间取决于设备，不在统计内。
+"""
+import contextlib
+import io
+import tempfile
+import timeit
+from pathlib import Path
+
+from app import state_file
+from app.assets import get_atlas
+from app.framebuffer import pack_frame
+from app.hid_device import DeviceManager
+from app.hid_frame import PACKET_SIZE
+from app.layout import get_layout
+from app.render import render_frame, render_metrics
+
+WEATHER = {
+    "daily": [{"fxDate": "2024-03-06", "tempMin": "-3", "tempMax": "12", "textDay": "多云",
+               "textNight": "晴", "iconDay": "101", "iconNight": "150"}],
+    "now": {"temp": "5"},
+    "minutely": "未来两小时无降水",
+    "name": "北京",
+}
+BEFORE = {"cpu_percent": 23.4, "per_cpu": [5, 15, 25, 35, 45, 55, 65, 95], "cpu_count": 8,
+          "mem_total": 16 * 1024 ** 3, "mem_percent": 57.3}
+AFTER = dict(BEFORE, cpu_percent=67.0, per_cpu=[95, 85, 75, 65, 55, 45, 35, 5], mem_percent=61.0)
+
+
+class NullHid:
+    """只计数的 HID 设备"""
+
+    def __init__(self):
+        self.packets = 0
+
+    def write(self, packet) -> int:
+        self.packets += 1
+        return len(packet)
+
+    def close(self):
+        pass
+
+
+def main(rounds: int = 50):
+    # 状态文件写到临时目录，不动真实的 ~/.update-weather
+    tmp = Path(tempfile.mkdtemp())
+    state_file.STATE_DIR = tmp
+    state_file.STATE_FILE = tmp / "state.json"
+    state_file.LOCK_FILE = tmp / "state.lock"
+
+    device = DeviceManager()
+    device.device = NullHid()
+
+    # 渲染 / 推送里保留了原脚本的调试输出，计时时屏蔽掉
+    with contextlib.redirect_stdout(io.StringIO()):
+        get_atlas().preload()
+        get_layout()
+        base = render_frame(WEATHER, BEFORE)
+        fast = render_metrics(base, AFTER)
+        frame = pack_frame(fast)
+
+        full_time = timeit.timeit(lambda: render_frame(WEATHER, AFTER), number=rounds) / rounds
+        fast_time = timeit.timeit(lambda: render_metrics(base, AFTER), number=rounds) / rounds
+        pack_time = timeit.timeit(lambda: pack_frame(fast), number=rounds) / rounds
+        push_time = timeit.timeit(lambda: device.push(frame), number=rounds) / rounds
+        save_time = timeit.timeit(lambda: state_file.update_last_frame_hash("0" * 40), number=rounds) / rounds
+        # 状态文件已存在时的读取
+        check_time = timeit.timeit(state_file.get_last_frame_hash, number=rounds) / rounds
+
+    packets = device.device.packets // rounds
+    total = fast_time + pack_time + check_time + push_time + save_time
+    print(f"完整渲染:         {full_time * 1000:.2f} ms/帧（对照）")
+    print(f"指标区重画:       {fast_time * 1000:.2f} ms/帧")
+    print(f"打包:             {pack_time * 1000:.2f} ms/帧")
+    print(f"去重检查读状态:   {check_time * 1000:.2f} ms")
+    print(f"整帧分包写入:     {push_time * 1000:.2f} ms（{packets} 包，{packets * PACKET_SIZE} 字节，不含 USB 传输）")
+    print(f"写回帧指纹:       {save_time * 1000:.2f} ms（文件锁 + fsync）")
+    print(f"每次指标刷新合计: {total * 1000:.2f} ms + {packets} 包的 USB 传输")
+
+
+if __name__ == "__main__":
+    main()
@@ -35,6 +35,7 @@ ICON_FILE="icon.icns"
 DATA_DIRS=(
   "img:img"
   "font:font"
+  "layout:layout"
   "legacy:legacy"
 )
 
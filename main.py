@@ -64,6 +64,13 @@ def run_tray_mode():
         # 延迟导入（防止子进程模式不必要加载）
         from app.tray import start_tray
         from app.scheduler import start_scheduler
+        from app.config import CONFIG
+
+        # 常驻工作进程模式：启动时就预热好，第一次刷新不用等 import
+        if CONFIG.refresh_mode == "worker":
+            from app.refresh_worker import get_worker
+            get_worker().ensure_started()
+            atexit.register(get_worker().stop)
 
         # 后台调度线程
         scheduler_thread = threading.Thread(
@@ -94,6 +101,7 @@ def run_refresh_mode():
     - 不启动托盘
     - 不启动调度器
     - 仅执行 legacy/update_weather.py 然后退出
+    - 无界面：不导入 tkinter，失败时输出一行结构化结果
     """
     from app.utils import resource_path
 
@@ -104,10 +112,17 @@ def run_refresh_mode():
         print(f"[Main] ❌ 未找到脚本: {legacy_script}")
         sys.exit(2)
 
+    from app.refresh_errors import EXIT_REFRESH_ERROR, RefreshError
+
     try:
         runpy.run_path(str(legacy_script), run_name="__main__")
         print("[Main] ✅ 单次刷新完成")
         sys.exit(0)
+    except RefreshError as e:
+        # 结构化结果交回托盘（子进程不弹窗）
+        print(f"[Main] ❌ 刷新失败: {e}")
+        print(e.to_line())
+        sys.exit(EXIT_REFRESH_ERROR)
     except Exception as e:
         print(f"[Main] ❌ 刷新工作模式异常: {e}")
         import traceback
@@ -120,7 +135,11 @@ if __name__ == "__main__":
     multiprocessing.freeze_support()
 
     # 兼容旧参数：--refresh
-    if "--gui" in sys.argv:
+    if "--startup-profile" in sys.argv:
+        # 各模式的 import 耗时分析（可再加 --gui / --refresh / --tray 只看一个模式）
+        from app.startup_profile import run
+        run()
+    elif "--gui" in sys.argv:
         run_gui_mode()
     elif "--refresh" in sys.argv:
         run_refresh_mode()
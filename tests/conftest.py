@@ -0,0 +1,10 @@
+# tests/conftest.py
+"""
+测试公共设置：把项目根目录加进 sys.path，直接运行 pytest 也能 import app
+"""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
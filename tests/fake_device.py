@@ -0,0 +1,98 @@
+# tests/fake_device.py
+"""
+模拟墨水屏（测试用）
+
+接口与 hid.device 一致（open_path / write / read / close），
+按固件协议拼包、解析消息，把画面写进自己的帧缓冲，
+可以在没有硬件的机器上验证整帧刷新、重连和多屏分发。
+"""
+from app.framebuffer import FRAME_BYTES
+from app.hid_frame import NEXT_HEADER, PACKET_SIZE
+
+VERSION_REPLY = b'\x01\x20' + b'\x00' * 7 + b'v3.5.0 ' + b'\x00\x00' + b'v0.2.0 ' + b'\x00\x00' + b'v1.0.0 '
+
+
+def _read_varint(buf: bytes, pos: int) -> tuple:
+    value = 0
+    shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        value |= (b & 0x7f) << shift
+        if not b & 0x80:
+            return value, pos
+        shift += 7
+
+
+def _parse_fields(buf: bytes) -> dict:
+    """极简 protobuf 解析：只支持 varint 和 length-delimited 字段"""
+    fields = {}
+    pos = 0
+    while pos < len(buf):
+        tag, pos = _read_varint(buf, pos)
+        number, wire_type = tag >> 3, tag & 0x07
+        if wire_type == 0:
+            value, pos = _read_varint(buf, pos)
+        elif wire_type == 2:
+            length, pos = _read_varint(buf, pos)
+            value = buf[pos:pos + length]
+            pos += length
+        else:
+            raise ValueError(f"不支持的 wire type: {wire_type}")
+        fields[number] = value
+    return fields
+
+
+class FakeEinkDevice:
+    def __init__(self):
+        self.framebuffer = bytearray(b'\xff' * FRAME_BYTES)
+        self.packets_received = 0
+        self.opened = False
+        self._pending = bytearray()
+        self._replies = []
+
+    # ================== hid.device 接口 ==================
+    def open_path(self, path):
+        self.opened = True
+
+    def close(self):
+        self.opened = False
+
+    def read(self, size: int, timeout_ms: int = 0):
+        if not self._replies:
+            return []
+        return list(self._replies.pop(0)[:size])
+
+    def write(self, packet) -> int:
+        if not self.opened:
+            raise ValueError("not open")
+        packet = bytes(packet)
+        if len(packet) != PACKET_SIZE or packet[0] != 0x01:
+            return -1
+        self.packets_received += 1
+
+        if packet[:2] == NEXT_HEADER:
+            self._pending += packet[2:]
+        else:
+            self._pending += packet[2:2 + packet[1]]
+
+        # 消息收齐（长度前缀满足）就处理
+        length, start = _read_varint(self._pending, 0)
+        if len(self._pending) - start >= length:
+            self._handle(bytes(self._pending[start:start + length]))
+            self._pending.clear()
+        return len(packet)
+
+    # ================== 协议处理 ==================
+    def _handle(self, message: bytes):
+        fields = _parse_fields(message)
+        command = fields.get(1)
+
+        if command == 1:
+            self._replies.append(VERSION_REPLY)
+            return
+
+        if command == 7:
+            sub = _parse_fields(fields[5])
+            data = sub[3]
+            self.framebuffer[:len(data)] = data
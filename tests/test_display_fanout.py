@@ -0,0 +1,88 @@
+# tests/test_display_fanout.py
+import os
+
+import pytest
+
+from app import display_fanout, eink, state_file
+from app.display_fanout import FanoutOutput
+from app.framebuffer import FRAME_BYTES
+from fake_device import FakeEinkDevice
+
+
+class BrokenDevice(FakeEinkDevice):
+    """能打开但每次写入都失败的屏"""
+
+    def write(self, packet) -> int:
+        return -1
+
+
+@pytest.fixture
+def devices(monkeypatch):
+    """按路径连接的模拟墨水屏；测试里可以增删"""
+    devices = {b"a": FakeEinkDevice(), b"b": FakeEinkDevice(), b"c": BrokenDevice()}
+
+    def open_path(path):
+        devices[path].open_path(path)
+        return devices[path]
+
+    monkeypatch.setattr(eink, "find_device_paths", lambda: list(devices))
+    monkeypatch.setattr(eink, "open_path", open_path)
+    monkeypatch.setattr(display_fanout, "RETRY_SECONDS", 0.05)
+    monkeypatch.setattr(display_fanout, "PUSH_TIMEOUT", 5.0)
+    return devices
+
+
+@pytest.fixture
+def hashes(monkeypatch):
+    """记下的已显示帧指纹"""
+    recorded = []
+    monkeypatch.setattr(state_file, "update_last_frame_hash", recorded.append)
+    return recorded
+
+
+@pytest.fixture
+def fanout():
+    output = FanoutOutput()
+    yield output
+    output.close()
+
+
+def test_pushes_to_every_device(devices, hashes, fanout):
+    del devices[b"c"]
+    frame = os.urandom(FRAME_BYTES)
+    assert fanout.submit(frame) == "pushed"
+    assert devices[b"a"].framebuffer == devices[b"b"].framebuffer == frame
+    assert all(item["ok"] for item in fanout.last_report.values())
+    assert hashes == [eink.frame_digest(frame)]
+
+    # 画面没变：各屏跳过
+    assert fanout.submit(frame) == "skipped"
+
+
+def test_failed_device_then_next_frame(devices, hashes, fanout):
+    first = os.urandom(FRAME_BYTES)
+    assert fanout.submit(first) == "pushed"
+    assert not fanout.last_report[b"c"]["ok"]
+    # 有屏失败时不记为已显示
+    assert hashes == []
+
+    # 失败的屏还在后台重试，下一帧提交不能出错
+    second = os.urandom(FRAME_BYTES)
+    assert fanout.submit(second) == "pushed"
+    assert devices[b"a"].framebuffer == devices[b"b"].framebuffer == second
+    assert fanout.last_report[b"a"]["ok"] and not fanout.last_report[b"c"]["ok"]
+
+
+def test_per_device_frames(devices, hashes, fanout):
+    del devices[b"c"]
+    frames = {b"a": os.urandom(FRAME_BYTES), b"b": os.urandom(FRAME_BYTES)}
+    assert fanout.submit(frames) == "pushed"
+    assert devices[b"a"].framebuffer == frames[b"a"]
+    assert devices[b"b"].framebuffer == frames[b"b"]
+
+
+def test_no_device(devices, fanout):
+    for path in (b"a", b"b", b"c"):
+        del devices[path]
+    assert fanout.submit(os.urandom(FRAME_BYTES)) == "no_device"
+    assert fanout.last_report == {}
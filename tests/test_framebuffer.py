@@ -0,0 +1,31 @@
+# tests/test_framebuffer.py
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from app.framebuffer import FRAME_BYTES, FRAME_HEIGHT, FRAME_WIDTH, pack_frame
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+@pytest.fixture(scope="module")
+def noise():
+    # frame_noise_t*.bin 是原字符串打包实现对 frame_noise.png 的输出
+    return Image.open(FIXTURES / "frame_noise.png").convert("RGB")
+
+
+@pytest.mark.parametrize("threshold", [1, 64, 128, 200, 255])
+def test_pack_frame_matches_golden(noise, threshold):
+    expected = (FIXTURES / f"frame_noise_t{threshold}.bin").read_bytes()
+    assert pack_frame(noise, threshold) == expected
+
+
+def test_pack_frame_size():
+    img = Image.new("RGB", (FRAME_WIDTH, FRAME_HEIGHT), "white")
+    assert pack_frame(img) == b"\xff" * FRAME_BYTES
+
+
+def test_bitmap_frame_packed_as_is(noise):
+    bitmap = noise.convert("L").point([0] * 128 + [255] * 128, "1")
+    assert pack_frame(bitmap, threshold=1) == (FIXTURES / "frame_noise_t128.bin").read_bytes()
@@ -0,0 +1,106 @@
+# tests/test_hid_device.py
+import os
+import random
+
+import pytest
+
+from app import eink
+from app.framebuffer import FRAME_BYTES
+from app.hid_device import DeviceManager
+from app.hid_frame import PacketFramer
+from fake_device import FakeEinkDevice
+
+FULL = PacketFramer().count
+ROW_BYTES = 16
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    """DeviceManager 连接到的模拟墨水屏"""
+    device = FakeEinkDevice()
+
+    def open_path(path):
+        device.open_path(path)
+        return device
+
+    monkeypatch.setattr(eink, "find_device_path", lambda: b"fake")
+    monkeypatch.setattr(eink, "open_path", open_path)
+    return device
+
+
+def _changed(prev: bytes, rng: random.Random) -> bytes:
+    """模拟 CPU / 内存区（y 54–90）或当前温度（y 205–225）的变化"""
+    cur = bytearray(prev)
+    y0, y1 = rng.choice([(54, 91), (205, 226)])
+    start = rng.randrange(y0, y1) * ROW_BYTES
+    end = min(start + rng.randint(1, 5) * ROW_BYTES, y1 * ROW_BYTES)
+    cur[start:end] = bytes(255 - b for b in cur[start:end])
+    return bytes(cur)
+
+
+def test_full_frames_land_in_framebuffer(fake):
+    manager = DeviceManager()
+    rng = random.Random(1)
+    frame = os.urandom(FRAME_BYTES)
+    manager.push(frame)
+    assert fake.framebuffer == frame
+
+    for _ in range(20):
+        frame = _changed(frame, rng)
+        before = fake.packets_received
+        manager.push(frame)
+        assert fake.packets_received - before == FULL
+        assert fake.framebuffer == frame
+
+
+def test_changed_packets_reported(fake):
+    manager = DeviceManager()
+    frame = os.urandom(FRAME_BYTES)
+    manager.push(frame)
+    # 第一帧：屏幕内容未知
+    assert manager.last_changed is None
+
+    cur = bytearray(frame)
+    # y 54 这一行（字节 864–879）落在第 14 包（数据 853–914）
+    cur[54 * ROW_BYTES:55 * ROW_BYTES] = bytes(255 - b for b in cur[54 * ROW_BYTES:55 * ROW_BYTES])
+    manager.push(bytes(cur))
+    assert manager.last_changed == [14]
+
+    manager.push(bytes(cur))
+    assert manager.last_changed == []
+
+
+def test_changed_packets_cover_every_difference():
+    framer = PacketFramer()
+    rng = random.Random(2)
+    prev = os.urandom(FRAME_BYTES)
+    for _ in range(50):
+        cur = _changed(prev, rng)
+        changed = framer.changed_packets(prev, cur)
+        # 只替换变化的包，结果与整帧一致
+        packets = [bytes(p) for p in framer.frame(prev)]
+        new = [bytes(p) for p in framer.frame(cur)]
+        for i in changed:
+            packets[i] = new[i]
+        assert packets == new
+        assert 0 < len(changed) < FULL
+        prev = cur
+
+
+def test_failed_write_reconnects_and_resends_full_frame(fake, monkeypatch):
+    manager = DeviceManager()
+    manager.push(os.urandom(FRAME_BYTES))
+    frame = os.urandom(FRAME_BYTES)
+
+    write = fake.write
+    calls = []
+
+    def flaky_write(packet):
+        calls.append(packet)
+        return -1 if len(calls) == 1 else write(packet)
+
+    monkeypatch.setattr(fake, "write", flaky_write)
+    manager.push(frame)
+    assert fake.framebuffer == frame
+    # 重连后屏幕内容未知，不统计变化包
+    assert manager.last_changed is None
@@ -0,0 +1,36 @@
+# tests/test_hid_frame.py
+from pathlib import Path
+
+import pytest
+
+from app.framebuffer import FRAME_BYTES
+from app.hid_frame import PACKET_SIZE, PacketFramer
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+# packets_*.bin 是原十六进制字符串分包实现的输出（77 包 × 64 字节首尾相连）
+FRAMES = {
+    "zero": lambda: bytes(FRAME_BYTES),
+    "ones": lambda: b"\xff" * FRAME_BYTES,
+    "noise_t128": lambda: (FIXTURES / "frame_noise_t128.bin").read_bytes(),
+}
+
+
+@pytest.mark.parametrize("name", sorted(FRAMES))
+def test_frame_matches_golden(name):
+    expected = (FIXTURES / f"packets_{name}.bin").read_bytes()
+    packets = PacketFramer().frame(FRAMES[name]())
+    assert all(len(p) == PACKET_SIZE for p in packets)
+    assert b"".join(packets) == expected
+
+
+def test_framer_reuse_overwrites_previous_frame():
+    framer = PacketFramer()
+    framer.frame(b"\xff" * FRAME_BYTES)
+    packets = framer.frame(bytes(FRAME_BYTES))
+    assert b"".join(packets) == (FIXTURES / "packets_zero.bin").read_bytes()
+
+
+def test_wrong_frame_size():
+    with pytest.raises(ValueError):
+        PacketFramer().frame(bytes(FRAME_BYTES - 1))
@@ -0,0 +1,86 @@
+# tests/test_http_cache.py
+import datetime
+import time
+
+import pytest
+
+from app import http_cache
+from app.http_cache import ResponseCache
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.status_code = 200
+        self.headers = {}
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.calls += 1
+        return FakeResponse({"code": "200", "call": self.calls})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """可调的 time.time()"""
+    state = {"now": time.time()}
+    monkeypatch.setattr(http_cache.time, "time", lambda: state["now"])
+    return state
+
+
+def _at(year, month, day, hour, minute):
+    return datetime.datetime(year, month, day, hour, minute).timestamp()
+
+
+def test_fresh_hit_within_ttl(tmp_path, clock):
+    cache = ResponseCache({"3d": 180 * 60}, cache_dir=tmp_path)
+    session = FakeSession()
+
+    clock["now"] = _at(2026, 10, 17, 10, 0)
+    assert cache.get_json(session, "3d", "u", {}, 5)[1] == "network"
+    clock["now"] = _at(2026, 10, 17, 11, 0)
+    payload, source = cache.get_json(session, "3d", "u", {}, 5)
+    assert source == "cache" and payload["call"] == 1
+    assert session.calls == 1
+
+
+def test_fresh_entry_from_yesterday_is_refetched_after_midnight(tmp_path, clock):
+    cache = ResponseCache({"3d": 180 * 60}, cache_dir=tmp_path)
+    session = FakeSession()
+
+    clock["now"] = _at(2026, 10, 17, 23, 0)
+    cache.get_json(session, "3d", "u", {}, 5)
+
+    # 0 点刷新：还在 3 小时新鲜期内，但已经跨天
+    clock["now"] = _at(2026, 10, 18, 0, 0)
+    payload, source = cache.get_json(session, "3d", "u", {}, 5)
+    assert source == "network" and payload["call"] == 2
+    assert session.calls == 2
+
+
+def test_stale_entry_from_yesterday_is_not_served(tmp_path, clock):
+    cache = ResponseCache({"3d": 60}, stale_while_revalidate=True, cache_dir=tmp_path)
+    session = FakeSession()
+
+    clock["now"] = _at(2026, 10, 17, 23, 59)
+    cache.get_json(session, "3d", "u", {}, 5)
+
+    clock["now"] = _at(2026, 10, 18, 0, 0) + 30
+    assert cache.get_json(session, "3d", "u", {}, 5)[1] == "network"
+    cache.wait()
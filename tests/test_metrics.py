@@ -0,0 +1,58 @@
+# tests/test_metrics.py
+import time
+
+import pytest
+
+from app import metrics
+from app.metrics import CpuSampler
+
+
+@pytest.fixture
+def fake_psutil(monkeypatch):
+    """按顺序返回预设的占用率；percpu 时各核心取同一序列"""
+    samples = []
+
+    def cpu_percent(interval=None, percpu=False):
+        value = samples.pop(0) if samples else 0.0
+        return [value, value * 2] if percpu else value
+
+    monkeypatch.setattr(metrics.psutil, "cpu_percent", cpu_percent)
+    monkeypatch.setattr(metrics.psutil, "cpu_count", lambda *a, **k: 2)
+    return samples
+
+
+def test_snapshot_averages_window(fake_psutil):
+    sampler = CpuSampler(interval=0.5, window=2.0)
+    assert sampler.size == 4
+
+    # 每次 _sample 取一次总占用率、一次各核心占用率
+    for value in (10.0, 20.0, 30.0):
+        fake_psutil += [value, value]
+        sampler._sample()
+    assert sampler.snapshot() == (20.0, [20.0, 40.0])
+
+
+def test_ring_buffer_keeps_latest_samples(fake_psutil):
+    sampler = CpuSampler(interval=0.5, window=1.0)
+    for value in (90.0, 10.0, 20.0):
+        fake_psutil += [value, value]
+        sampler._sample()
+    # 窗口只有 2 个槽位，最早的 90 已被覆盖
+    assert sampler.snapshot() == (15.0, [15.0, 30.0])
+
+
+def test_collect_metrics_uses_running_sampler(monkeypatch):
+    sampler = CpuSampler(interval=0.05, window=0.2)
+    monkeypatch.setattr(metrics, "_sampler", sampler)
+    sampler.start()
+    try:
+        start = time.perf_counter()
+        result = metrics.collect_metrics(interval=2)
+        # 后台采样在跑时不阻塞 2 秒
+        assert time.perf_counter() - start < 1.0
+    finally:
+        sampler.stop()
+
+    assert 0.0 <= result["cpu_percent"] <= 100.0
+    assert len(result["per_cpu"]) == sampler.cores
+    assert result["mem_total"] > 0
@@ -0,0 +1,159 @@
+# tests/test_refresh_queue.py
+import threading
+
+import pytest
+
+from app.refresh_queue import DONE, FAILED, RefreshQueue
+
+
+class SlowHandler:
+    """执行时阻塞到 release()，方便在任务执行中提交请求"""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self._release = threading.Event()
+        self.runs = []
+
+    def __call__(self, job):
+        self.runs.append((job.kind, tuple(job.sources), job.force))
+        self.started.set()
+        self._release.wait(5)
+
+    def release(self):
+        self._release.set()
+
+
+@pytest.fixture
+def slow():
+    handler = SlowHandler()
+    yield handler
+    handler.release()
+
+
+@pytest.fixture
+def queue(slow):
+    metrics_runs = []
+    queue = RefreshQueue({"refresh": slow, "metrics": lambda job: metrics_runs.append(job.sources)})
+    queue.metrics_runs = metrics_runs
+    return queue
+
+
+def _start(queue, slow, **kwargs):
+    job, merged = queue.submit("refresh", "scheduled", **kwargs)
+    assert not merged
+    assert slow.started.wait(5)
+    return job
+
+
+def test_clicks_merge_into_running_refresh(queue, slow):
+    first = _start(queue, slow)
+    for _ in range(10):
+        assert queue.submit("refresh", "manual") == (first, True)
+    slow.release()
+
+    assert first.wait(5) and first.state == DONE
+    assert len(slow.runs) == 1
+    assert first.sources == ["scheduled"] + ["manual"] * 10
+    assert queue.stats()["coalesced"] == 10
+
+
+def test_metrics_dropped_while_refresh_runs(queue, slow):
+    first = _start(queue, slow)
+    assert queue.submit("metrics", "metrics") == (None, False)
+    slow.release()
+
+    assert first.wait(5)
+    assert queue.metrics_runs == []
+    assert queue.stats()["dropped"] == 1
+
+
+def test_forced_request_reruns_after_non_forced_job(queue, slow):
+    first = _start(queue, slow)
+    forced, merged = queue.submit("refresh", "manual", force=True)
+    assert forced is not first and not merged
+    # 之后的请求都并入排队中的强制刷新
+    assert queue.submit("refresh", "manual", force=True) == (forced, True)
+    assert queue.submit("refresh", "scheduled") == (forced, True)
+    slow.release()
+
+    assert forced.wait(5) and first.state == DONE and forced.state == DONE
+    assert slow.runs == [
+        ("refresh", ("scheduled",), False),
+        ("refresh", ("manual", "manual", "scheduled"), True),
+    ]
+
+
+def test_forced_request_merges_into_forced_job(queue, slow):
+    first = _start(queue, slow, force=True)
+    assert queue.submit("refresh", "manual", force=True) == (first, True)
+    slow.release()
+
+    assert first.wait(5)
+    assert len(slow.runs) == 1
+
+
+def test_config_change_reruns_and_absorbs_later_requests(queue, slow):
+    first = _start(queue, slow)
+    config_job, merged = queue.submit("refresh", "config")
+    assert config_job is not first and not merged
+    assert queue.submit("refresh", "scheduled") == (config_job, True)
+    slow.release()
+
+    assert config_job.wait(5) and config_job.state == DONE
+    assert [run[1] for run in slow.runs] == [("scheduled",), ("config", "scheduled")]
+
+
+def test_pending_job_takes_highest_priority():
+    # 不启动执行线程，只看排队中的任务被合并后的优先级
+    queue = RefreshQueue({})
+    queue._ensure_thread = lambda: None
+    job, _ = queue.submit("refresh", "scheduled")
+    assert job.priority == 3
+    queue.submit("refresh", "manual")
+    assert job.priority == 0
+
+
+def test_handler_error_marks_job_failed():
+    def broken(job):
+        raise RuntimeError("boom")
+
+    queue = RefreshQueue({"refresh": broken})
+    job, _ = queue.submit("refresh", "manual")
+    assert job.wait(5)
+    assert job.state == FAILED and job.error == "boom"
+    assert job.wait_seconds is not None and job.run_seconds is not None
+
+
+def test_stuck_handler_times_out_and_queue_moves_on():
+    release = threading.Event()
+    timeouts = []
+    metrics_runs = []
+
+    def stuck(job):
+        release.wait(5)
+
+    queue = RefreshQueue(
+        {"refresh": stuck, "metrics": lambda job: metrics_runs.append(job.id)},
+        timeout=0.1,
+        on_timeout=timeouts.append,
+    )
+    job, _ = queue.submit("refresh", "scheduled")
+    assert job.wait(5)
+    assert job.state == FAILED and "0.1" in job.error
+    assert timeouts == [job]
+
+    # 队列继续执行其他任务
+    metrics_job, _ = queue.submit("metrics", "metrics")
+    assert metrics_job.wait(5) and metrics_job.state == DONE
+    assert metrics_runs == [metrics_job.id]
+
+    # 卡住的 handler 结束前，同类任务直接失败，不叠加新线程
+    again, _ = queue.submit("refresh", "manual")
+    assert again.wait(5) and again.state == FAILED
+    assert timeouts == [job]
+
+    release.set()
+    assert queue._stuck["refresh"].join(5) is None
+    after, _ = queue.submit("refresh", "manual")
+    assert after.wait(5) and after.state == DONE
+    assert queue.stats()["timed_out"] == 1
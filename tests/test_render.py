@@ -0,0 +1,49 @@
+# tests/test_render.py
+import contextlib
+import io
+from pathlib import Path
+
+import pytest
+
+from app.framebuffer import pack_frame
+from app.layout import get_layout
+from app.render import render_frame, render_metrics
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+WEATHER = {
+    "daily": [{"fxDate": "2024-03-06", "tempMin": "-3", "tempMax": "12", "textDay": "多云",
+               "textNight": "晴", "iconDay": "101", "iconNight": "150"}],
+    "now": {"temp": "5"},
+    "minutely": "未来两小时无降水",
+    "name": "北京",
+}
+BEFORE = {"cpu_percent": 23.4, "per_cpu": [5, 15, 25, 35, 45, 55, 65, 95], "cpu_count": 8,
+          "mem_total": 16 * 1024 ** 3, "mem_percent": 57.3}
+AFTER = dict(BEFORE, cpu_percent=67.0, per_cpu=[95, 85, 75, 65, 55, 45, 35, 5], mem_percent=61.0)
+
+
+@pytest.fixture(params=["1", "rgb"])
+def layout(request):
+    return get_layout("default", request.param, 128)
+
+
+def _quiet(fn, *args):
+    # 渲染里保留了原脚本的调试输出
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args)
+
+
+def test_render_matches_original_script(layout):
+    # render_sample.bin 是原 update_weather.py 用同样数据发到墨水屏的帧
+    expected = (FIXTURES / "render_sample.bin").read_bytes()
+    image = _quiet(render_frame, WEATHER, BEFORE, layout)
+    assert pack_frame(image, 128) == expected
+
+
+def test_render_metrics_matches_full_render(layout):
+    base = _quiet(render_frame, WEATHER, BEFORE, layout)
+    full = _quiet(render_frame, WEATHER, AFTER, layout)
+    fast = _quiet(render_metrics, base, AFTER, layout)
+    assert fast.tobytes() == full.tobytes()
+    assert fast.tobytes() != base.tobytes()
@@ -0,0 +1,183 @@
+# tests/test_scheduler.py
+"""用模拟时钟验证调度：正常走时、休眠唤醒、时钟前跳 / 回拨、小幅校时、夜间、配置变更"""
+import datetime
+
+import pytest
+
+from app.scheduler import MAX_SLEEP_SECONDS, Scheduler, _calc_next_time
+
+
+class FakeConfig:
+    refresh_interval_minutes = 30
+    force_refresh_at_midnight = True
+    metrics_interval_seconds = 0
+    skip_night = True
+    night_start = 23
+    night_end = 7
+    refresh_immediately_on_config_change = True
+
+    def __init__(self):
+        self.reloads = 0
+
+    def reload(self):
+        self.reloads += 1
+
+
+class FakeState:
+    def __init__(self):
+        self.config_changed = False
+        self.next_refresh_times = []
+
+    def update_next_refresh_time(self, value):
+        self.next_refresh_times.append(value)
+
+    def get_config_changed(self):
+        return self.config_changed
+
+    def set_config_changed(self, value):
+        self.config_changed = value
+
+
+class Clock:
+    def __init__(self, wall):
+        self.wall = wall
+        self.mono = 1000.0
+
+    def step(self, seconds, suspended=False):
+        """走 seconds 秒；suspended 时单调时钟停走（休眠）"""
+        self.wall += datetime.timedelta(seconds=seconds)
+        if not suspended:
+            self.mono += seconds
+
+
+class Harness:
+    def __init__(self, wall):
+        self.clock = Clock(wall)
+        self.config = FakeConfig()
+        self.state = FakeState()
+        self.refreshes = []
+        self.scheduler = Scheduler(
+            monotonic=lambda: self.clock.mono,
+            now=lambda: self.clock.wall,
+            refresh=lambda source: self.refreshes.append((self.clock.wall.strftime("%d %H:%M"), source)),
+            metrics=lambda: None,
+            config=self.config,
+            state=self.state,
+        )
+
+    @property
+    def sources(self) -> list:
+        return [source for _, source in self.refreshes]
+
+    def run_for(self, minutes):
+        """正常走时，按调度器自己的节奏醒来（最多睡 MAX_SLEEP_SECONDS）"""
+        scheduler = self.scheduler
+        end = self.clock.wall + datetime.timedelta(minutes=minutes)
+        while self.clock.wall < end:
+            wait = MAX_SLEEP_SECONDS
+            if scheduler._heap:
+                wait = min(wait, max(scheduler._heap[0][0] - self.clock.mono, 0))
+            self.clock.step(wait)
+            scheduler._tick()
+
+    def suspend(self, seconds):
+        self.clock.step(seconds, suspended=True)
+        self.scheduler._tick()
+
+    def reset_at(self, wall):
+        """把墙上时钟拨到 wall 并按它重新排程（不算跳变）"""
+        self.clock.wall = wall
+        self.scheduler._reschedule_all(wall)
+        self.scheduler._last_wall, self.scheduler._last_mono = wall, self.clock.mono
+        self.refreshes.clear()
+
+
+@pytest.fixture
+def h():
+    harness = Harness(datetime.datetime(2024, 3, 6, 9, 10))
+    harness.scheduler.start()
+    return harness
+
+
+def test_regular_interval(h):
+    h.run_for(65)
+    assert h.sources == ["startup", "scheduled", "scheduled"]
+    assert [when for when, _ in h.refreshes[1:]] == ["06 09:30", "06 10:00"]
+    # 下次刷新时间只在变化时写状态文件
+    assert h.state.next_refresh_times == [
+        datetime.datetime(2024, 3, 6, 9, 30),
+        datetime.datetime(2024, 3, 6, 10, 0),
+        datetime.datetime(2024, 3, 6, 10, 30),
+    ]
+
+
+def test_resume_after_suspend_refreshes_once(h):
+    h.refreshes.clear()
+    h.suspend(3 * 3600)
+    assert h.sources == ["resume"]
+    assert h.scheduler.next_refresh_time == datetime.datetime(2024, 3, 6, 12, 30)
+    h.run_for(30)
+    assert h.sources == ["resume", "scheduled"]
+
+
+def test_forward_jump_past_refresh_point(h):
+    h.refreshes.clear()
+    h.suspend(45 * 60)
+    assert h.sources == ["resume"]
+
+
+def test_backward_jump_realigns_without_refresh(h):
+    h.run_for(20)
+    h.refreshes.clear()
+    h.clock.wall -= datetime.timedelta(hours=1)
+    h.scheduler._tick()
+    assert h.refreshes == []
+    assert h.scheduler.next_refresh_time == _calc_next_time(h.clock.wall, h.config)
+    h.run_for(31)
+    assert h.sources == ["scheduled"]
+
+
+def test_small_adjustment_is_not_a_jump(h):
+    next_time = h.scheduler.next_refresh_time
+    h.refreshes.clear()
+    h.clock.wall += datetime.timedelta(seconds=3)
+    h.scheduler._tick()
+    assert h.refreshes == [] and h.scheduler.next_refresh_time == next_time
+
+
+def test_suspend_overnight_refreshes_once_in_the_morning(h):
+    h.reset_at(datetime.datetime(2024, 3, 6, 22, 50))
+    h.suspend(10 * 3600)
+    assert h.sources == ["resume"]
+
+
+def test_wake_during_night_waits_for_night_end(h):
+    h.reset_at(datetime.datetime(2024, 3, 8, 23, 10))
+    h.suspend(3 * 3600)
+    assert h.refreshes == []
+    assert h.scheduler.next_refresh_time == datetime.datetime(2024, 3, 9, 7, 0)
+
+
+def test_midnight_refresh(h):
+    h.reset_at(datetime.datetime(2024, 3, 6, 22, 0))
+    h.config.skip_night = False
+    h.run_for(125)
+    assert ("07 00:00", "midnight") in h.refreshes
+
+
+def test_config_change_event_reloads_and_refreshes(h):
+    h.run_for(5)
+    h.refreshes.clear()
+    h.state.config_changed = True
+    h.config.refresh_interval_minutes = 60
+    h.scheduler._tick(had_events=True)
+
+    assert h.config.reloads == 1 and h.state.config_changed is False
+    assert h.sources == ["config"]
+    assert h.scheduler.next_refresh_time == datetime.datetime(2024, 3, 6, 10, 0)
+
+
+def test_config_not_read_without_events_or_due_timers(h):
+    h.state.config_changed = True
+    h.scheduler._tick()
+    assert h.config.reloads == 0
@@ -0,0 +1,67 @@
+# tests/test_state_file.py
+import datetime
+import multiprocessing
+import threading
+
+import pytest
+
+from app import state_file
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(state_file, "STATE_DIR", tmp_path)
+    monkeypatch.setattr(state_file, "STATE_FILE", tmp_path / "state.json")
+    monkeypatch.setattr(state_file, "LOCK_FILE", tmp_path / "state.lock")
+    return tmp_path
+
+
+def test_setters_keep_other_fields():
+    when = datetime.datetime(2026, 10, 18, 12, 0)
+    state_file.update_next_refresh_time(when)
+    state_file.set_config_changed(True)
+    state_file.update_last_frame_hash("abc")
+
+    assert state_file.get_next_refresh_time() == when
+    assert state_file.get_config_changed() is True
+    assert state_file.get_last_frame_hash() == "abc"
+
+
+def test_concurrent_updates_are_not_lost(state_dir):
+    def writer(i):
+        for j in range(20):
+            state_file.update_state(**{f"key_{i}": j})
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    data = state_file.load_state()
+    assert all(data[f"key_{i}"] == 19 for i in range(4))
+    # 每次写入的临时文件都已替换或清理
+    assert not list(state_dir.glob("*.tmp"))
+
+
+def _process_writer(state_dir, i):
+    from pathlib import Path
+
+    state_file.STATE_DIR = Path(state_dir)
+    state_file.STATE_FILE = Path(state_dir) / "state.json"
+    state_file.LOCK_FILE = Path(state_dir) / "state.lock"
+    for j in range(10):
+        state_file.update_state(**{f"proc_{i}": j})
+
+
+def test_concurrent_processes_do_not_overwrite_each_other(state_dir):
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_process_writer, args=(str(state_dir), i)) for i in range(3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(30)
+        assert p.exitcode == 0
+
+    data = state_file.load_state()
+    assert all(data[f"proc_{i}"] == 9 for i in range(3))